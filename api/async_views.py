@@ -0,0 +1,63 @@
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from reflectionsBE.aio import async_jwt_required, run_blocking
+from reflectionsBE.authentication import get_user_id_from_request
+from .utils import IMAGE_CHUNK_SIZE, image_response, open_image
+from .views import list_user_images, store_upload
+
+
+# Async counterparts of the storage-bound views in api/views.py, served under
+# ASGI; the S3 work itself is the same code, run on the S3 executor
+
+
+@csrf_exempt
+@require_POST
+@async_jwt_required
+async def upload_file_and_get_presigned_url(request):
+    uploaded_file = request.FILES.get("file")
+    if not uploaded_file:
+        return JsonResponse({"error": "No file present"}, status=400)
+
+    payload, status = await run_blocking(
+        store_upload, get_user_id_from_request(request), uploaded_file
+    )
+    return JsonResponse(payload, status=status)
+
+
+@require_GET
+@async_jwt_required
+async def list_presigned_urls(request):
+    payload, status = await run_blocking(
+        list_user_images, get_user_id_from_request(request), request.GET.get("cursor")
+    )
+    return JsonResponse(payload, status=status)
+
+
+@require_GET
+@async_jwt_required
+async def download_image(request):
+    url = request.GET.get("url")
+    if not url:
+        return HttpResponse("Missing url parameter", status=400)
+    try:
+        upstream = await run_blocking(open_image, url, request.META)
+        return image_response(upstream, url, aiter_image(upstream))
+
+    except Exception as e:
+        return HttpResponse(f"Error: {str(e)}", status=500)
+
+
+async def aiter_image(upstream):
+    # Django buffers sync iterators completely under ASGI, so pull each chunk
+    # on the executor instead
+    chunks = upstream.raw.stream(IMAGE_CHUNK_SIZE, decode_content=False)
+    try:
+        while True:
+            chunk = await run_blocking(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        await run_blocking(upstream.close)
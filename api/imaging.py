@@ -0,0 +1,41 @@
+import io
+
+from PIL import Image, ImageOps
+
+
+# Kept free of Django imports: this module is loaded by the thumbnail worker
+# processes, which never set up the app registry.
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+SAVE_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+}
+
+
+def resize_image_keep_aspect(img, max_width, max_height):
+    resized = img.copy()
+    resized.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+    return resized
+
+
+def render_variants(data: bytes, widths, formats):
+    """Encode ``data`` at every width in ``widths`` that is smaller than the image.
+
+    Each variant fits a ``width`` x ``width`` box. Returns a list of
+    ``(width, height, format, bytes)``.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        # phone photos are stored sideways with an orientation tag
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        variants = []
+        for width in sorted(widths):
+            if width >= max(img.size):
+                break
+            resized = resize_image_keep_aspect(img, width, width)
+            for fmt in formats:
+                frame = resized.convert("RGB") if fmt == "jpeg" else resized
+                out = io.BytesIO()
+                frame.save(out, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+                variants.append((width, resized.height, fmt, out.getvalue()))
+        return variants
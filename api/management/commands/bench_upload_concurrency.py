@@ -0,0 +1,94 @@
+import asyncio
+import io
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from reflectionsBE.aio import run_blocking, s3_executor
+from reflectionsBE.storage import LocalStorage
+
+
+class FakeUpload(io.BytesIO):
+    content_type = "image/png"
+
+    def __init__(self, name, size):
+        super().__init__(b"\0" * size)
+        self.name = name
+
+
+class LatencyStorage(LocalStorage):
+    """Local storage where every write waits like a round trip to S3."""
+
+    def __init__(self, root, latency):
+        super().__init__(root)
+        self.latency = latency
+
+    def upload_fileobj(self, key, fileobj, content_type=None):
+        time.sleep(self.latency)
+        super().upload_fileobj(key, fileobj, content_type)
+
+
+def upload_round_trip(storage, upload):
+    # the storage-bound part of api.views.store_upload
+    key = f"uploads/user-1/{upload.name}"
+    storage.upload_fileobj(key, upload, upload.content_type)
+    return storage.presigned_url(key)
+
+
+def run_sync(storage, uploads, size):
+    # a gunicorn sync worker handles one request at a time
+    for i in range(uploads):
+        upload_round_trip(storage, FakeUpload(f"sync-{i}.png", size))
+
+
+async def run_async(storage, uploads, size, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with limit:
+            await run_blocking(upload_round_trip, storage, FakeUpload(f"async-{i}.png", size))
+
+    await asyncio.gather(*(one(i) for i in range(uploads)))
+
+
+def measure(fn):
+    wall, cpu = time.perf_counter(), time.process_time()
+    fn()
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+class Command(BaseCommand):
+    help = "Compare upload throughput of one sync worker against one ASGI worker with the S3 executor"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--uploads", type=int, default=200)
+        parser.add_argument("--latency-ms", type=int, default=80)
+        parser.add_argument("--size-kb", type=int, default=256)
+        parser.add_argument("--concurrency", type=int, default=s3_executor._max_workers)
+
+    def handle(self, *args, **options):
+        uploads = options["uploads"]
+        size = options["size_kb"] * 1024
+        concurrency = options["concurrency"]
+        with tempfile.TemporaryDirectory() as root:
+            storage = LatencyStorage(root, options["latency_ms"] / 1000)
+            rows = [
+                ("sync worker", measure(lambda: run_sync(storage, uploads, size))),
+                (
+                    f"async worker, {concurrency} in flight",
+                    measure(
+                        lambda: asyncio.run(run_async(storage, uploads, size, concurrency))
+                    ),
+                ),
+            ]
+
+        self.stdout.write(
+            f"{uploads} uploads of {options['size_kb']} KB, "
+            f"{options['latency_ms']} ms per S3 upload"
+        )
+        for label, (wall, cpu) in rows:
+            self.stdout.write(
+                f"{label:<30} {uploads / wall:8.1f} uploads/s per core, "
+                f"{cpu / uploads * 1000:6.2f} ms cpu per upload"
+            )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from api.models import ImageVariant
+from api.thumbnails import generate_variants
+from journal.models import Entry
+from reflectionsBE.sharding import shard_aliases
+from reflectionsBE.storage import get_storage
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnails for entry images that were uploaded before the pipeline, or failed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None)
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        # entries live on their users' shards and the variants on default, so
+        # each shard is read on its own and compared in Python
+        image_keys = set()
+        for alias in shard_aliases():
+            image_keys.update(
+                Entry.objects.using(alias)
+                .filter(imgKey__isnull=False)
+                .values_list("imgKey", flat=True)
+                .distinct()
+            )
+        done_keys = set(ImageVariant.objects.values_list("sourceKey", flat=True))
+        pending = sorted(image_keys - done_keys)
+        if options["limit"]:
+            pending = pending[: options["limit"]]
+
+        done = failed = 0
+        for key in pending:
+            try:
+                generate_variants(key, storage.read(key))
+                done += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{key}: {e}")
+        self.stdout.write(f"generated thumbnails for {done} images, {failed} failed")
@@ -0,0 +1,63 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from api.media import user_prefix
+from api.models import UserMedia
+from reflectionsBE.storage import get_storage
+from users.models import UserStorage
+
+
+def list_user_objects(storage, user_id):
+    for obj in storage.list_objects(user_prefix(user_id)):
+        key = obj["Key"]
+        # folder marker and profile picture are not gallery images
+        if key.endswith("/") or "/profile_pic/" in key:
+            continue
+        yield obj
+
+
+class Command(BaseCommand):
+    help = "Rebuild UserMedia rows and quota counters from the S3 upload prefixes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users")
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        user_ids = options["users"] or User.objects.order_by("id").values_list("id", flat=True)
+        for user_id in user_ids:
+            objects = {
+                obj["Key"]: obj for obj in list_user_objects(storage, user_id)
+            }
+            with transaction.atomic():
+                known = set(
+                    UserMedia.objects.filter(user_id=user_id).values_list("key", flat=True)
+                )
+                UserMedia.objects.filter(user_id=user_id).exclude(key__in=objects).delete()
+                UserMedia.objects.bulk_create(
+                    [
+                        UserMedia(
+                            user_id=user_id,
+                            key=key,
+                            size=obj["Size"],
+                            uploadedAt=obj["LastModified"],
+                        )
+                        for key, obj in objects.items()
+                        if key not in known
+                    ]
+                )
+                totals = UserMedia.objects.filter(user_id=user_id).aggregate(
+                    count=Count("id"), size=Sum("size")
+                )
+                UserStorage.objects.update_or_create(
+                    user_id=user_id,
+                    defaults={
+                        "mediaCount": totals["count"],
+                        "mediaBytes": totals["size"] or 0,
+                    },
+                )
+            self.stdout.write(
+                f"user {user_id}: {totals['count']} images, {totals['size'] or 0} bytes"
+            )
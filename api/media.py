@@ -0,0 +1,97 @@
+import os
+
+from django.db import transaction
+from django.db.models import F
+
+from reflectionsBE.pagination import KeysetPagination
+from users.models import UserStorage
+from .models import UserMedia
+
+
+MAX_IMAGES_PER_USER = 50
+GALLERY_PAGE_SIZE = int(os.getenv("GALLERY_PAGE_SIZE", "50"))
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+class MediaPagination(KeysetPagination):
+    page_size = GALLERY_PAGE_SIZE
+    orderings = {
+        "-uploadedAt": ("uploadedAt", True),
+        "uploadedAt": ("uploadedAt", False),
+    }
+
+
+def user_prefix(user_id) -> str:
+    return f"uploads/user-{user_id}/"
+
+
+def storage_counters(user_id):
+    return UserStorage.objects.filter(user_id=user_id)
+
+
+def reserve_slot(user_id, key):
+    """Take one of the user's image slots before the bytes go to S3.
+
+    The check and the increment are one conditional UPDATE, so concurrent
+    uploads cannot overshoot the limit. Re-uploading an existing key reuses
+    its slot. Returns whether a slot was taken, for ``release_slot``.
+    """
+    if UserMedia.objects.filter(key=key).exists():
+        return False
+    UserStorage.objects.get_or_create(user_id=user_id)
+    taken = storage_counters(user_id).filter(
+        mediaCount__lt=MAX_IMAGES_PER_USER
+    ).update(mediaCount=F("mediaCount") + 1)
+    if not taken:
+        raise QuotaExceeded(f"Maximum of {MAX_IMAGES_PER_USER} images allowed")
+    return True
+
+
+def release_slot(user_id):
+    storage_counters(user_id).update(mediaCount=F("mediaCount") - 1)
+
+
+def record_upload(user_id, key, size, content_type, slot_taken):
+    with transaction.atomic():
+        media, created = UserMedia.objects.select_for_update().get_or_create(
+            key=key,
+            defaults={"user_id": user_id, "size": size, "contentType": content_type or ""},
+        )
+        delta = size
+        if not created:
+            delta = size - media.size
+            UserMedia.objects.filter(pk=media.pk).update(
+                size=size, contentType=content_type or ""
+            )
+        counts = {"mediaBytes": F("mediaBytes") + delta}
+        if created and not slot_taken:
+            # another upload of the same key released its row in between
+            counts["mediaCount"] = F("mediaCount") + 1
+        elif slot_taken and not created:
+            counts["mediaCount"] = F("mediaCount") - 1
+        storage_counters(user_id).update(**counts)
+    return media
+
+
+def record_delete(key):
+    with transaction.atomic():
+        media = UserMedia.objects.select_for_update().filter(key=key).first()
+        if media is None:
+            return None
+        media.delete()
+        storage_counters(media.user_id).update(
+            mediaCount=F("mediaCount") - 1, mediaBytes=F("mediaBytes") - media.size
+        )
+    return media
+
+
+def gallery_page(user_id, cursor=None, sort="-uploadedAt"):
+    paginator = MediaPagination(sort)
+    items = paginator.paginate_queryset(
+        UserMedia.objects.filter(user_id=user_id).only("id", "key", "uploadedAt"),
+        cursor,
+    )
+    return items, paginator
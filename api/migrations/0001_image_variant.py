@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sourceKey', models.CharField(max_length=512)),
+                ('key', models.CharField(max_length=512)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('format', models.CharField(max_length=8)),
+                ('size', models.PositiveIntegerField()),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('sourceKey', 'width', 'format'), name='imagevariant_unique')],
+            },
+        ),
+    ]
@@ -1,3 +1,41 @@
 from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
 
-# Create your models here.
+
+class ImageVariant(models.Model):
+    # a resized copy of an uploaded image, written by api/thumbnails.py
+    sourceKey = models.CharField(max_length=512)
+    key = models.CharField(max_length=512)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=8)
+    size = models.PositiveIntegerField()
+    createdAt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sourceKey", "width", "format"], name="imagevariant_unique"
+            )
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class UserMedia(models.Model):
+    # one row per uploaded gallery image; quota and gallery read this, not S3
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="media")
+    key = models.CharField(max_length=512, unique=True)
+    size = models.BigIntegerField(default=0)
+    contentType = models.CharField(max_length=100, blank=True, default="")
+    uploadedAt = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "uploadedAt"], name="usermedia_user_uploaded_idx"),
+        ]
+
+    def __str__(self):
+        return self.key
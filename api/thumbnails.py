@@ -0,0 +1,128 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+from reflectionsBE.storage import get_storage
+
+from .imaging import CONTENT_TYPES, render_variants
+from .models import ImageVariant
+
+
+logger = logging.getLogger(__name__)
+
+# bounding box sizes, smallest first; the formats are tried in order when
+# picking a variant for a client
+THUMBNAIL_WIDTHS = tuple(
+    int(w) for w in os.getenv("THUMBNAIL_WIDTHS", "160,320,640,1280").split(",")
+)
+THUMBNAIL_FORMATS = ("webp", "jpeg")
+THUMBNAIL_PROCESSES = int(os.getenv("THUMBNAIL_PROCESSES", "2"))
+THUMBNAIL_PREFIX = "thumbs"
+
+# Resizing is CPU bound and would hold the GIL, so it runs in worker processes.
+# A thread per job waits on the process and then does the S3 and DB writes.
+executor = ThreadPoolExecutor(
+    max_workers=THUMBNAIL_PROCESSES, thread_name_prefix="thumbnails"
+)
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn, not fork: the web worker has live threads and sockets
+            _process_pool = ProcessPoolExecutor(
+                max_workers=THUMBNAIL_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def is_thumbnailable(content_type) -> bool:
+    # vector images have nothing to gain from a raster thumbnail
+    return (
+        bool(content_type)
+        and content_type.startswith("image/")
+        and content_type != "image/svg+xml"
+    )
+
+
+def variant_key(source_key, width, fmt) -> str:
+    # outside uploads/user-<id>/ so variants never count against the image limit
+    return f"{THUMBNAIL_PREFIX}/w{width}/{source_key}.{fmt}"
+
+
+def generate_variants(source_key, data: bytes):
+    storage = get_storage()
+    rendered = process_pool().submit(
+        render_variants, data, THUMBNAIL_WIDTHS, THUMBNAIL_FORMATS
+    ).result()
+    for width, height, fmt, body in rendered:
+        key = variant_key(source_key, width, fmt)
+        storage.put_object(
+            key,
+            body,
+            content_type=CONTENT_TYPES[fmt],
+            # re-uploading a source with the same name rewrites its variants
+            cache_control="private, no-cache",
+        )
+        ImageVariant.objects.update_or_create(
+            sourceKey=source_key,
+            width=width,
+            format=fmt,
+            defaults={"key": key, "height": height, "size": len(body)},
+        )
+    return len(rendered)
+
+
+def run_generation(source_key, data):
+    close_old_connections()
+    try:
+        generate_variants(source_key, data)
+    except Exception:
+        # the original keeps being served; generate_thumbnails can retry
+        logger.exception("Could not generate thumbnails for %s", source_key)
+    finally:
+        close_old_connections()
+
+
+def schedule_thumbnails(source_key, data: bytes):
+    return executor.submit(run_generation, source_key, data)
+
+
+def delete_variants(source_key):
+    variants = ImageVariant.objects.filter(sourceKey=source_key)
+    keys = list(variants.values_list("key", flat=True))
+    if keys:
+        get_storage().delete_many(keys)
+    variants.delete()
+    return keys
+
+
+def preview_keys(source_keys, size):
+    """Map each source key to the smallest ready variant covering ``size`` px.
+
+    Keys without a large enough variant (not generated yet, or an image that
+    is already small) map to themselves, so callers can always presign the
+    result. One query for the whole page.
+    """
+    source_keys = set(source_keys)
+    best = {}
+    if source_keys:
+        variants = ImageVariant.objects.filter(
+            sourceKey__in=source_keys, width__gte=size
+        ).values_list("sourceKey", "key", "width", "format")
+        for source_key, key, width, fmt in variants:
+            rank = (width, THUMBNAIL_FORMATS.index(fmt))
+            if source_key not in best or rank < best[source_key][0]:
+                best[source_key] = (rank, key)
+    return {
+        source_key: best[source_key][1] if source_key in best else source_key
+        for source_key in source_keys
+    }
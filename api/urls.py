@@ -1,6 +1,11 @@
 from django.urls import path
+from reflectionsBE.aio import ASYNC_STORAGE_VIEWS
 from .views import hello, upload_file_and_get_presigned_url, list_presigned_urls, download_image, delete_image
 
+if ASYNC_STORAGE_VIEWS:
+    # same urls, served by coroutines when running under ASGI
+    from .async_views import upload_file_and_get_presigned_url, list_presigned_urls, download_image
+
 urlpatterns = [
     path('hello/', hello),
     path('upload/', upload_file_and_get_presigned_url, name='upload-file'),
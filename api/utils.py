@@ -1,18 +1,18 @@
 import os
-import boto3
-from botocore.exceptions import ClientError
-from dotenv import load_dotenv
+from itertools import islice
+
+import requests
+from django.http import HttpResponse, StreamingHttpResponse
+from requests.adapters import HTTPAdapter
+
+from reflectionsBE.storage import STORAGE_ERRORS, get_storage
 
-load_dotenv()
-s3_client = boto3.client('s3', region_name="ap-south-1")
-BUCKET_NAME = os.getenv('AWS_S3_BUCKET_NAME')
 
 def list_s3_files(max_keys=50):
     try:
-        response = s3_client.list_objects_v2(Bucket=BUCKET_NAME, MaxKeys=max_keys)
-        files = response.get('Contents', [])
+        files = islice(get_storage().list_objects(""), max_keys)
         return [file['Key'] for file in files]
-    except ClientError as e:
+    except STORAGE_ERRORS as e:
         print("error: ",e)
 
 
@@ -28,3 +28,76 @@ def read_from_file(file_path: str) -> str:
             return f.read()
     except FileNotFoundError:
         return ""
+
+
+# Image download proxy. One pooled session per process keeps connections to
+# S3 alive between downloads; bodies are piped through in chunks instead of
+# being read into memory.
+IMAGE_CHUNK_SIZE = 64 * 1024
+IMAGE_FETCH_TIMEOUT = (5, 30)
+IMAGE_POOL_SIZE = int(os.getenv("IMAGE_POOL_SIZE", "32"))
+# client header -> WSGI META key
+FORWARDED_REQUEST_HEADERS = {
+    "Range": "HTTP_RANGE",
+    "If-Range": "HTTP_IF_RANGE",
+    "If-None-Match": "HTTP_IF_NONE_MATCH",
+    "If-Modified-Since": "HTTP_IF_MODIFIED_SINCE",
+}
+FORWARDED_RESPONSE_HEADERS = (
+    "Content-Length",
+    "Content-Range",
+    "Content-Encoding",
+    "Accept-Ranges",
+    "ETag",
+    "Last-Modified",
+)
+# 304 and 416 have no image body but still mean the request was understood
+PROXIED_STATUSES = {200, 206, 304, 416}
+
+image_session = requests.Session()
+image_session.mount(
+    "https://", HTTPAdapter(pool_connections=4, pool_maxsize=IMAGE_POOL_SIZE)
+)
+
+
+def open_image(url, meta):
+    headers = {
+        header: meta[key]
+        for header, key in FORWARDED_REQUEST_HEADERS.items()
+        if key in meta
+    }
+    return image_session.get(
+        url, headers=headers, stream=True, timeout=IMAGE_FETCH_TIMEOUT
+    )
+
+
+def iter_image(upstream):
+    # raw bytes, so Content-Length and Content-Range stay true to the body;
+    # the connection goes back to the pool once the generator is closed
+    try:
+        yield from upstream.raw.stream(IMAGE_CHUNK_SIZE, decode_content=False)
+    finally:
+        upstream.close()
+
+
+def image_response(upstream, url, streaming_content):
+    if upstream.status_code not in PROXIED_STATUSES:
+        upstream.close()
+        return HttpResponse("Failed to fetch image", status=500)
+
+    if upstream.status_code in (200, 206):
+        response = StreamingHttpResponse(
+            streaming_content,
+            status=upstream.status_code,
+            content_type=upstream.headers.get("Content-Type", "image/jpeg"),
+        )
+    else:
+        upstream.close()
+        response = HttpResponse(status=upstream.status_code)
+
+    for header in FORWARDED_RESPONSE_HEADERS:
+        if header in upstream.headers:
+            response[header] = upstream.headers[header]
+    filename = url.split("/")[-1].split("?")[0]
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,110 +1,116 @@
 import os
 import requests
-import boto3
-from botocore.client import Config
 from django.shortcuts import render
-from botocore.exceptions import ClientError
 from django.http import JsonResponse
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import AccessToken
 from urllib.parse import urlparse, unquote
 from dotenv import load_dotenv
 import json
 from diff_match_patch import diff_match_patch
 from journal.models import Entry
-from api.utils import list_s3_files
+from api.media import (
+    QuotaExceeded,
+    gallery_page,
+    record_delete,
+    record_upload,
+    release_slot,
+    reserve_slot,
+    user_prefix,
+)
+from api.thumbnails import delete_variants, is_thumbnailable, schedule_thumbnails
+from api.utils import image_response, iter_image, list_s3_files, open_image
+from reflectionsBE.authentication import get_user_id_from_request
+from reflectionsBE.pagination import InvalidCursor
+from reflectionsBE.storage import STORAGE_ERRORS, get_storage
 import traceback
 
 load_dotenv()
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=os.getenv("AWS_REGION")
-)
-BUCKET_NAME = os.getenv("AWS_S3_BUCKET_NAME")
 
 
 def hello(request):
     return JsonResponse({"message": "hello from the django backend for reflections"})
 
 
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def upload_file_and_get_presigned_url(request):
-    if request.method != "POST":
-        return JsonResponse({"error": "POST request required"}, status=400)
+# Storage work shared by the sync views below and the async ones in
+# api/async_views.py; each returns (payload, status)
+def store_upload(user_id, uploaded_file):
+    storage = get_storage()
+    s3_key = f"{user_prefix(user_id)}{uploaded_file.name}"
+    try:
+        slot_taken = reserve_slot(user_id, s3_key)
+    except QuotaExceeded as e:
+        return {"error": str(e)}, 400
 
-    uploaded_file = request.FILES.get("file")
-    if not uploaded_file:
-        return JsonResponse({"error": "No file present"}, status=400)
+    try:
+        thumbnail_source = None
+        if is_thumbnailable(uploaded_file.content_type):
+            thumbnail_source = uploaded_file.read()
+            uploaded_file.seek(0)
+        storage.upload_fileobj(s3_key, uploaded_file, uploaded_file.content_type)
+        record_upload(
+            user_id, s3_key, uploaded_file.size, uploaded_file.content_type, slot_taken
+        )
 
-    user_id = get_user_id_from_request(request)
+        if thumbnail_source is not None:
+            schedule_thumbnails(s3_key, thumbnail_source)
 
-    prefix = f"uploads/user-{user_id}/"
-    response = s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
-    objects = response.get("Contents", [])
-    if len(objects) >= 50:
-        return JsonResponse({"error": "Maximum of 50 images allowed"}, status=400)
+        presigned_url = storage.presigned_url(s3_key)
 
-    s3_key = f"{prefix}{uploaded_file.name}"
-    try:
-        s3_client.upload_fileobj(
-            uploaded_file,
-            BUCKET_NAME,
-            s3_key,
-            ExtraArgs={"ContentType": uploaded_file.content_type},
-        )
+        return {"url": presigned_url, "key": s3_key}, 201
+    except STORAGE_ERRORS as e:
+        if slot_taken:
+            release_slot(user_id)
+        return {"error": str(e)}, 500
 
-        presigned_url = s3_client.generate_presigned_url(
-            "get_object", Params={"Bucket": BUCKET_NAME, "Key": s3_key}, ExpiresIn=3600
-        )
 
-        return JsonResponse({"url": presigned_url, "key": s3_key}, status=201)
-    except ClientError as e:
-        return JsonResponse({"error": str(e)}, status=500)
+def list_user_images(user_id, cursor=None):
+    try:
+        items, paginator = gallery_page(user_id, cursor)
+        storage = get_storage()
+        urls = [{"key": media.key, "url": storage.presigned_url(media.key)} for media in items]
+        return {
+            "files": urls,
+            "next_cursor": paginator.next_cursor,
+            "prev_cursor": paginator.prev_cursor,
+        }, 200
 
+    except InvalidCursor as e:
+        return {"error": str(e), "files": []}, 400
 
 
-def get_user_id_from_request(request):
-    auth_header = request.headers.get(
-        "Authorization"
-    )
-    if auth_header and auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
-        access_token = AccessToken(token)
-        return access_token["user_id"]
-    return None
+def fetch_image(url, meta):
+    try:
+        upstream = open_image(url, meta)
+        return image_response(upstream, url, iter_image(upstream))
 
+    except Exception as e:
+        return HttpResponse(f"Error: {str(e)}", status=500)
 
-@api_view(["GET"])
+
+@api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def list_presigned_urls(request):
-    try:
-        user_id = get_user_id_from_request(request)
+def upload_file_and_get_presigned_url(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "POST request required"}, status=400)
 
-        response = s3_client.list_objects_v2(
-            Bucket=BUCKET_NAME, Prefix=f"uploads/user-{user_id}/"
-        )
-        objects = response.get("Contents", [])
-        urls = []
+    uploaded_file = request.FILES.get("file")
+    if not uploaded_file:
+        return JsonResponse({"error": "No file present"}, status=400)
 
-        for obj in objects:
-            key = obj["Key"]
-            if key.endswith("/"):
-                continue
-            presigned_url = s3_client.generate_presigned_url(
-                "get_object", Params={"Bucket": BUCKET_NAME, "Key": key}, ExpiresIn=3600
-            )
-            urls.append({"key": key, "url": presigned_url})
+    payload, status = store_upload(get_user_id_from_request(request), uploaded_file)
+    return JsonResponse(payload, status=status)
 
-        return JsonResponse({"files": urls}, status=200)
 
-    except ClientError as e:
-        return JsonResponse({"error": str(e), "files": []}, status=500)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def list_presigned_urls(request):
+    payload, status = list_user_images(
+        get_user_id_from_request(request), request.GET.get("cursor")
+    )
+    return JsonResponse(payload, status=status)
 
 
 @api_view(["GET"])
@@ -113,21 +119,7 @@ def download_image(request):
     url = request.GET.get("url")
     if not url:
         return HttpResponse("Missing url parameter", status=400)
-
-    try:
-        response = requests.get(url, stream=True)
-        if response.status_code != 200:
-            return HttpResponse("Failed to fetch image", status=500)
-
-        content_type = response.headers.get("Content-Type", "image/jpeg")
-        filename = url.split("/")[-1].split("?")[0]
-
-        django_response = HttpResponse(response.content, content_type=content_type)
-        django_response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        return django_response
-
-    except Exception as e:
-        return HttpResponse(f"Error: {str(e)}", status=500)
+    return fetch_image(url, request.META)
 
 
 @api_view(["DELETE"])
@@ -139,8 +131,7 @@ def delete_image(request):
             if not url:
                 return JsonResponse({"error": "No URL provided"}, status=400)
 
-            parsed = urlparse(url)
-            key = unquote(parsed.path.lstrip("/"))
+            key = get_storage().key_from_url(url)
 
             user_id = get_user_id_from_request(request)
 
@@ -150,8 +141,9 @@ def delete_image(request):
                     {"error": "Unauthorized to delete this file"}, status=403
                 )
 
-            s3 = boto3.client("s3")
-            s3.delete_object(Bucket=BUCKET_NAME, Key=key)
+            get_storage().delete(key)
+            record_delete(key)
+            delete_variants(key)
 
             return JsonResponse({"message": "Image deleted successfully"})
 
@@ -0,0 +1,147 @@
+import re
+from dataclasses import dataclass, field
+from html import escape
+from html.parser import HTMLParser
+
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# text inside these is not visible, BeautifulSoup's get_text skips it as well
+SKIP_TEXT_TAGS = {"script", "style"}
+SRC_ATTR_RE = re.compile(r"""(\ssrc\s*=\s*)("[^"]*"|'[^']*'|[^\s"'>]+)""", re.IGNORECASE)
+
+
+@dataclass
+class EntryAnalysis:
+    heading: str | None = None
+    img_srcs: list = field(default_factory=list)
+    text: str = ""
+    word_count: int = 0
+    letter_count: int = 0
+
+    @property
+    def title(self):
+        return self.heading if self.heading is not None else "Untitled"
+
+    @property
+    def first_img_src(self):
+        return self.img_srcs[0] if self.img_srcs else None
+
+
+class EntryHTMLParser(HTMLParser):
+    """Collects heading, image srcs and visible text in one pass, without a tree.
+
+    When ``rewrite_src`` is given, every ``<img src>`` is passed through it and
+    the rewritten document is available as ``rewritten_html`` after ``close()``.
+    """
+
+    def __init__(self, rewrite_src=None):
+        super().__init__(convert_charrefs=True)
+        self.rewrite_src = rewrite_src
+        self.heading = None
+        self.img_srcs = []
+        self._chunks = []
+        self._heading_tag = None
+        self._heading_parts = []
+        self._skip_depth = 0
+        self._source = ""
+        self._line_starts = None
+        self._replacements = []
+
+    def feed(self, data):
+        self._source += data
+        super().feed(data)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+        elif tag in HEADING_TAGS and self.heading is None and self._heading_tag is None:
+            self._heading_tag = tag
+            self._heading_parts = []
+        elif tag == "img":
+            src = dict(attrs).get("src")
+            if src is not None:
+                self.img_srcs.append(src)
+                if self.rewrite_src is not None:
+                    self._queue_src_rewrite(src)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TEXT_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == self._heading_tag:
+            self._finish_heading()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        data = data.strip()
+        if not data:
+            return
+        self._chunks.append(data)
+        if self._heading_tag is not None:
+            self._heading_parts.append(data)
+
+    def close(self):
+        super().close()
+        if self._heading_tag is not None:
+            self._finish_heading()
+
+    def _finish_heading(self):
+        self.heading = "".join(self._heading_parts)
+        self._heading_tag = None
+        self._heading_parts = []
+
+    def _offset(self):
+        if self._line_starts is None:
+            self._line_starts = [0]
+            for match in re.finditer("\n", self._source):
+                self._line_starts.append(match.end())
+        lineno, col = self.getpos()
+        return self._line_starts[lineno - 1] + col
+
+    def _queue_src_rewrite(self, src):
+        raw = self.get_starttag_text()
+        try:
+            new_src = self.rewrite_src(src)
+        except Exception as e:
+            print(f"Could not refresh {src}: {e}")
+            return
+        new_raw = SRC_ATTR_RE.sub(
+            lambda m: f'{m.group(1)}"{escape(new_src, quote=True)}"', raw, count=1
+        )
+        self._replacements.append((self._offset(), raw, new_raw))
+
+    @property
+    def text(self):
+        return " ".join(self._chunks)
+
+    @property
+    def rewritten_html(self):
+        out = []
+        cursor = 0
+        for start, raw, new_raw in self._replacements:
+            out.append(self._source[cursor:start])
+            out.append(new_raw)
+            cursor = start + len(raw)
+        out.append(self._source[cursor:])
+        return "".join(out)
+
+
+def analyze_html(html_content: str) -> EntryAnalysis:
+    parser = EntryHTMLParser()
+    parser.feed(html_content or "")
+    parser.close()
+    text = parser.text
+    return EntryAnalysis(
+        heading=parser.heading,
+        img_srcs=parser.img_srcs,
+        text=text,
+        word_count=len(text.split()),
+        letter_count=len(text.replace(" ", "")),
+    )
+
+
+def rewrite_img_srcs(html_content: str, rewrite_src) -> str:
+    parser = EntryHTMLParser(rewrite_src=rewrite_src)
+    parser.feed(html_content or "")
+    parser.close()
+    return parser.rewritten_html
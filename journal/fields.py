@@ -0,0 +1,70 @@
+import zlib
+
+from django.db import models
+
+
+RAW_MARKER = b"\x00"
+ZLIB_MARKER = b"\x01"
+
+
+class CompressedTextField(models.TextField):
+    """Text in Python, a marker byte plus utf-8 or zlib data in a binary column.
+
+    Values shorter than ``min_compress_bytes`` are stored raw, so small
+    entries don't pay the zlib header. Serializers and views still see a str.
+    """
+
+    def __init__(self, *args, min_compress_bytes=512, compress_level=6, **kwargs):
+        self.min_compress_bytes = min_compress_bytes
+        self.compress_level = compress_level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.min_compress_bytes != 512:
+            kwargs["min_compress_bytes"] = self.min_compress_bytes
+        if self.compress_level != 6:
+            kwargs["compress_level"] = self.compress_level
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        # column type comes from the backend's BinaryField mapping (LONGBLOB on MySQL)
+        return "BinaryField"
+
+    def compress(self, value: str) -> bytes:
+        raw = value.encode("utf-8")
+        if len(raw) < self.min_compress_bytes:
+            return RAW_MARKER + raw
+        compressed = zlib.compress(raw, self.compress_level)
+        if len(compressed) >= len(raw):
+            return RAW_MARKER + raw
+        return ZLIB_MARKER + compressed
+
+    @staticmethod
+    def decompress(value) -> str:
+        data = bytes(value)
+        marker, body = data[:1], data[1:]
+        if marker == ZLIB_MARKER:
+            return zlib.decompress(body).decode("utf-8")
+        if marker == RAW_MARKER:
+            return body.decode("utf-8")
+        # rows written before compression have no marker
+        return data.decode("utf-8")
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, str):
+            return value
+        return self.decompress(value)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return None
+        return self.compress(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return connection.Database.Binary(value)
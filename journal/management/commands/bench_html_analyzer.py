@@ -0,0 +1,84 @@
+import time
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+
+from journal.analyzer import analyze_html, rewrite_img_srcs
+
+
+def make_entry_html(target_bytes, img_every):
+    parts = ["<h2>Benchmark entry</h2>"]
+    size = 0
+    i = 0
+    while size < target_bytes:
+        if i % img_every == 0:
+            chunk = (
+                f'<p><img src="https://bucket.s3.amazonaws.com/uploads/user-1/img-{i}.png'
+                f'?X-Amz-Signature=abc{i}&amp;X-Amz-Expires=3600" alt="img {i}"></p>'
+            )
+        else:
+            chunk = f"<p>Paragraph {i} with <b>some</b> <i>formatted</i> journal text &amp; more.</p>"
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    return "".join(parts)
+
+
+def soup_baseline(html):
+    # the per-field BeautifulSoup passes journal/utils.py used to make
+    soup = BeautifulSoup(html, "html.parser")
+    heading = soup.find(["h1", "h2", "h3", "h4", "h5", "h6"])
+    title = heading.get_text(strip=True) if heading else "Untitled"
+    soup = BeautifulSoup(html, "html.parser")
+    img = soup.find("img")
+    src = img["src"] if img and img.has_attr("src") else None
+    text = BeautifulSoup(html, "html.parser").get_text(" ", strip=True)
+    return title, src, len(text.split()), len(text.replace(" ", ""))
+
+
+def soup_rewrite(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for img in soup.find_all("img"):
+        if img.has_attr("src"):
+            img["src"] = img["src"] + "&r=1"
+    return str(soup)
+
+
+def timed(fn, html, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = "Compare the single-pass HTML analyzer against BeautifulSoup on large entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-kb", type=int, default=500)
+        parser.add_argument("--img-every", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        html = make_entry_html(options["size_kb"] * 1024, options["img_every"])
+        analysis = analyze_html(html)
+        self.stdout.write(
+            f"entry: {len(html) // 1024} KB, {len(analysis.img_srcs)} images, "
+            f"{analysis.word_count} words"
+        )
+
+        repeat = options["repeat"]
+        rows = [
+            ("title+img+text (bs4, 3 parses)", timed(soup_baseline, html, repeat)),
+            ("title+img+text (analyzer)", timed(analyze_html, html, repeat)),
+            ("rewrite img srcs (bs4)", timed(soup_rewrite, html, repeat)),
+            (
+                "rewrite img srcs (analyzer)",
+                timed(lambda h: rewrite_img_srcs(h, lambda src: src + "&r=1"), html, repeat),
+            ),
+        ]
+        for label, seconds in rows:
+            self.stdout.write(f"{label:<34} {seconds * 1000:9.1f} ms")
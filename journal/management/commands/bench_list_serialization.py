@@ -0,0 +1,112 @@
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from journal.management.commands.bench_html_analyzer import make_entry_html
+from journal.models import Entry
+from journal.serializers import EntrySerializer
+from journal.utils import apply_derived_fields
+from journal.views import ENTRY_LIST_FIELDS, JournalPagination
+from reflectionsBE.renderers import FastJSONRenderer
+from reflectionsBE.sharding import activate_user
+from tasks.models import Task
+from tasks.serializers import TASK_FIELDS, TaskSerializer
+from tasks.views import TaskPagination
+
+
+def entry_dicts(entries):
+    # what the list view built from model instances before it read values()
+    return [
+        {
+            "id": entry.id,
+            "title": entry.title,
+            "url": None,
+            "content": entry.plainText,
+            "createdAt": entry.createdAt,
+            "lastUpdated": entry.lastUpdated,
+        }
+        for entry in entries
+    ]
+
+
+def entry_rows(rows):
+    return [
+        {
+            "id": row["id"],
+            "title": row["title"],
+            "url": None,
+            "content": row["plainText"],
+            "createdAt": row["createdAt"],
+            "lastUpdated": row["lastUpdated"],
+        }
+        for row in rows
+    ]
+
+
+def timed(build, renderer, repeat):
+    best = None
+    body = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = renderer.render({"success": True, "items": build()})
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+
+class Command(BaseCommand):
+    help = "Time a task list page and a journal list page: serializers vs values() and orjson"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entry-kb", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        user = User.objects.create_user(f"bench-{uuid.uuid4().hex[:12]}")
+        try:
+            activate_user(user.id)
+            for i in range(TaskPagination.page_size):
+                Task.objects.create(user=user, description=f"Benchmark task {i}")
+            html = make_entry_html(options["entry_kb"] * 1024, img_every=1000)
+            for _ in range(JournalPagination.page_size):
+                entry = Entry(user=user, entryContent=html)
+                apply_derived_fields(entry)
+                entry.save()
+
+            tasks = Task.objects.filter(user=user).order_by("-lastUpdated", "-id")
+            entries = Entry.objects.filter(user=user).order_by("-lastUpdated", "-id")
+            drf, fast = JSONRenderer(), FastJSONRenderer()
+            sections = [
+                (
+                    f"{TaskPagination.page_size} tasks",
+                    [
+                        ("TaskSerializer + JSONRenderer", lambda: TaskSerializer(tasks, many=True).data, drf),
+                        ("values() + JSONRenderer", lambda: list(tasks.values(*TASK_FIELDS)), drf),
+                        ("values() + FastJSONRenderer", lambda: list(tasks.values(*TASK_FIELDS)), fast),
+                    ],
+                ),
+                (
+                    f"{JournalPagination.page_size} entries, {options['entry_kb']} KB each",
+                    [
+                        ("EntrySerializer + JSONRenderer", lambda: EntrySerializer(entries, many=True).data, drf),
+                        ("defer() instances + JSONRenderer", lambda: entry_dicts(entries.defer("entryContent")), drf),
+                        ("values() + JSONRenderer", lambda: entry_rows(entries.values(*ENTRY_LIST_FIELDS)), drf),
+                        ("values() + FastJSONRenderer", lambda: entry_rows(entries.values(*ENTRY_LIST_FIELDS)), fast),
+                    ],
+                ),
+            ]
+            for title, rows in sections:
+                self.stdout.write(title)
+                bodies = {}
+                for label, build, renderer in rows:
+                    seconds, bodies[label] = timed(build, renderer, repeat)
+                    self.stdout.write(f"  {label:<34} {seconds * 1000:8.3f} ms")
+                same = bodies[rows[-2][0]] == bodies[rows[-1][0]]
+                self.stdout.write(f"  renderers agree: {'yes' if same else 'NO'}")
+        finally:
+            # the pre_delete receiver removes the rows from the user's shard
+            user.delete()
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='imgKey',
+            field=models.CharField(blank=True, max_length=1024, null=True),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='letterCount',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='plainText',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='title',
+            field=models.CharField(default='Untitled', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='wordCount',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
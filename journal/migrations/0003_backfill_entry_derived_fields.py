@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+BATCH_SIZE = 500
+
+
+def backfill_derived_fields(apps, schema_editor):
+    from journal.utils import derive_entry_fields
+
+    Entry = apps.get_model("journal", "Entry")
+    fields = ["title", "plainText", "imgKey", "wordCount", "letterCount"]
+    batch = []
+    for entry in Entry.objects.only("id", "entryContent").iterator(chunk_size=BATCH_SIZE):
+        for field, value in derive_entry_fields(entry.entryContent).items():
+            setattr(entry, field, value)
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            Entry.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Entry.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0002_entry_derived_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_derived_fields, migrations.RunPython.noop),
+    ]
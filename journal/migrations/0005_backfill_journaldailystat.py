@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Entry = apps.get_model("journal", "Entry")
+    JournalDailyStat = apps.get_model("journal", "JournalDailyStat")
+    rows = (
+        Entry.objects.annotate(day=TruncDate("createdAt"))
+        .values("user_id", "day")
+        .annotate(
+            entries=Count("id"), words=Sum("wordCount"), letters=Sum("letterCount")
+        )
+        .order_by()
+    )
+    JournalDailyStat.objects.bulk_create(
+        (
+            JournalDailyStat(
+                user_id=row["user_id"],
+                day=row["day"],
+                entryCount=row["entries"],
+                wordCount=row["words"] or 0,
+                letterCount=row["letters"] or 0,
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=500,
+    )
+
+
+def clear_daily_stats(apps, schema_editor):
+    apps.get_model("journal", "JournalDailyStat").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0004_journaldailystat'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_stats, clear_daily_stats),
+    ]
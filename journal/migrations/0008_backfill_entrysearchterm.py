@@ -0,0 +1,41 @@
+from collections import Counter
+
+from django.db import migrations
+
+
+BATCH_SIZE = 500
+
+
+def backfill_search_terms(apps, schema_editor):
+    from journal.search import tokenize
+
+    Entry = apps.get_model("journal", "Entry")
+    EntrySearchTerm = apps.get_model("journal", "EntrySearchTerm")
+    postings = []
+    for entry in Entry.objects.only("id", "user_id", "plainText").iterator(chunk_size=BATCH_SIZE):
+        for term, frequency in Counter(tokenize(entry.plainText)).items():
+            postings.append(
+                EntrySearchTerm(
+                    user_id=entry.user_id, entry_id=entry.id, term=term, frequency=frequency
+                )
+            )
+        if len(postings) >= BATCH_SIZE:
+            EntrySearchTerm.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+            postings = []
+    if postings:
+        EntrySearchTerm.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+
+
+def clear_search_terms(apps, schema_editor):
+    apps.get_model("journal", "EntrySearchTerm").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0007_entrysearchterm'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_terms, clear_search_terms),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0008_backfill_entrysearchterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntryRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('patch', models.TextField()),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+                ('compacted', models.BooleanField(default=False)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='journal.entry')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['entry', 'compacted'], name='journal_revision_pending')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations, models
+
+import journal.fields
+
+
+BATCH_SIZE = 200
+
+
+def copy_content(apps, source, target):
+    Entry = apps.get_model("journal", "Entry")
+    batch = []
+    for entry in Entry.objects.only("id", source).iterator(chunk_size=BATCH_SIZE):
+        setattr(entry, target, getattr(entry, source))
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            Entry.objects.bulk_update(batch, [target])
+            batch = []
+    if batch:
+        Entry.objects.bulk_update(batch, [target])
+
+
+def compress_content(apps, schema_editor):
+    copy_content(apps, "entryContent", "entryContentData")
+
+
+def decompress_content(apps, schema_editor):
+    copy_content(apps, "entryContentData", "entryContent")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0009_entryrevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='entryContentData',
+            field=journal.fields.CompressedTextField(default=''),
+            preserve_default=False,
+        ),
+        migrations.RunPython(compress_content, decompress_content),
+        # lets the old column be re-added with a default when migrating backwards
+        migrations.AlterField(
+            model_name='entry',
+            name='entryContent',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='entry',
+            name='entryContent',
+        ),
+        migrations.RenameField(
+            model_name='entry',
+            old_name='entryContentData',
+            new_name='entryContent',
+        ),
+    ]
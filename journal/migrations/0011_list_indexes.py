@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0010_compress_entry_content'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['user', 'lastUpdated'], name='entry_user_lastupdated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['user', 'createdAt'], name='entry_user_createdat_idx'),
+        ),
+    ]
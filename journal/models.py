@@ -1,11 +1,99 @@
 from django.db import models
 from django.contrib.auth.models import User
+from .fields import CompressedTextField
 
 class Entry(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="entries")
-    entryContent = models.TextField()
+    # no FK constraint: auth_user is on default, these rows may be on a shard
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="entries", db_constraint=False
+    )
+    entryContent = CompressedTextField()
     createdAt = models.DateTimeField(auto_now_add=True)
     lastUpdated = models.DateTimeField(auto_now=True)
 
+    # derived from entryContent on every write so list views never parse HTML
+    title = models.CharField(max_length=255, default="Untitled")
+    plainText = models.TextField(blank=True, default="")
+    imgKey = models.CharField(max_length=1024, null=True, blank=True)
+    wordCount = models.PositiveIntegerField(default=0)
+    letterCount = models.PositiveIntegerField(default=0)
+
+    # every list query filters by user and orders by one of these
+    ORDERINGS = {
+        "-lastUpdated": ("-lastUpdated", "-id"),
+        "lastUpdated": ("lastUpdated", "id"),
+        "-createdAt": ("-createdAt", "-id"),
+        "createdAt": ("createdAt", "id"),
+    }
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "lastUpdated"], name="entry_user_lastupdated_idx"),
+            models.Index(fields=["user", "createdAt"], name="entry_user_createdat_idx"),
+        ]
+
+    def __str__(self):
+        return f"Entry {self.id}"
+
+
+class JournalDailyStat(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="daily_stats", db_constraint=False
+    )
+    day = models.DateField()
+    entryCount = models.PositiveIntegerField(default=0)
+    wordCount = models.PositiveIntegerField(default=0)
+    letterCount = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day"], name="journal_dailystat_user_day")
+        ]
+
+    def __str__(self):
+        return f"JournalDailyStat {self.user_id} {self.day}"
+
+
+class JournalStreak(models.Model):
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="journal_streak", db_constraint=False
+    )
+    currentStreak = models.PositiveIntegerField(default=0)
+    longestStreak = models.PositiveIntegerField(default=0)
+    # day the current streak ends on
+    lastEntryDay = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"JournalStreak {self.user_id} {self.currentStreak}/{self.longestStreak}"
+
+
+class EntrySearchTerm(models.Model):
+    # inverted index postings over Entry.plainText, maintained on write
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="entry_search_terms", db_constraint=False
+    )
+    entry = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name="search_terms")
+    term = models.CharField(max_length=64)
+    frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "term"], name="journal_search_user_term")]
+
+    def __str__(self):
+        return f"EntrySearchTerm {self.entry_id} {self.term}"
+
+
+class EntryRevision(models.Model):
+    # append-only log of diff-match-patch patches, folded into Entry on compaction
+    entry = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name="revisions")
+    patch = models.TextField()
+    createdAt = models.DateTimeField(auto_now_add=True)
+    compacted = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["entry", "compacted"], name="journal_revision_pending")
+        ]
+
     def __str__(self):
-        return f"Entry {self.id}"
\ No newline at end of file
+        return f"EntryRevision {self.id} of Entry {self.entry_id}"
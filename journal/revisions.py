@@ -0,0 +1,89 @@
+import os
+
+from diff_match_patch import diff_match_patch
+from reflectionsBE.sharding import user_atomic
+
+from .models import Entry, EntryRevision
+from .search import index_entry_terms
+from .utils import DERIVED_FIELDS, apply_derived_fields, bump_daily_stat, entry_day
+
+
+# autosaves only append a patch; the entry row is rewritten once per this many
+COMPACT_AFTER = int(os.getenv("ENTRY_COMPACT_AFTER", "20"))
+
+
+def parse_patch(patch_text: str):
+    # raises ValueError on malformed input, so bad patches never reach the log
+    return diff_match_patch().patch_fromText(patch_text)
+
+
+def append_revision(entry_id, patch_text: str) -> int:
+    EntryRevision.objects.create(entry_id=entry_id, patch=patch_text)
+    return EntryRevision.objects.filter(entry_id=entry_id, compacted=False).count()
+
+
+def materialize(base_html: str, revisions) -> str:
+    dmp = diff_match_patch()
+    html = base_html
+    for revision in revisions:
+        html, _ = dmp.patch_apply(dmp.patch_fromText(revision.patch), html)
+    return html
+
+
+def compact_entry(entry_id):
+    with user_atomic():
+        # lock the entry before reading the log: a concurrent compaction blocks
+        # here and then finds nothing pending, instead of replaying the patches
+        entry = Entry.objects.select_for_update().filter(id=entry_id).first()
+        if entry is None:
+            return None
+        pending = list(
+            EntryRevision.objects.select_for_update()
+            .filter(entry_id=entry_id, compacted=False)
+            .only("id", "patch", "createdAt")
+            .order_by("id")
+        )
+        if not pending:
+            return None
+
+        old_words, old_letters = entry.wordCount, entry.letterCount
+        entry.entryContent = materialize(entry.entryContent, pending)
+        apply_derived_fields(entry)
+        # lastUpdated is the time of the last edit, not of the compaction, so
+        # the entry looks the same whenever it happens to be compacted
+        entry.lastUpdated = pending[-1].createdAt
+        Entry.objects.filter(id=entry.id).update(
+            entryContent=entry.entryContent,
+            lastUpdated=entry.lastUpdated,
+            **{field: getattr(entry, field) for field in DERIVED_FIELDS},
+        )
+        bump_daily_stat(
+            entry.user_id,
+            entry_day(entry),
+            words=entry.wordCount - old_words,
+            letters=entry.letterCount - old_letters,
+        )
+        index_entry_terms(entry)
+        EntryRevision.objects.filter(id__in=[r.id for r in pending]).update(compacted=True)
+        return entry
+
+
+def latest_revision_id(entry_id) -> int:
+    return (
+        EntryRevision.objects.filter(entry_id=entry_id)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+        or 0
+    )
+
+
+def compact_pending_for_user(user):
+    # called before reads, usually only the entry currently being edited is pending
+    entry_ids = (
+        EntryRevision.objects.filter(entry__user=user, compacted=False)
+        .values_list("entry_id", flat=True)
+        .distinct()
+    )
+    for entry_id in list(entry_ids):
+        compact_entry(entry_id)
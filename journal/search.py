@@ -0,0 +1,89 @@
+import re
+from collections import Counter
+
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+
+from .models import EntrySearchTerm
+
+
+TERM_RE = re.compile(r"\w+")
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+
+def tokenize(text: str) -> list:
+    return [term[:MAX_TERM_LENGTH] for term in TERM_RE.findall((text or "").lower())]
+
+
+def index_entry_terms(entry):
+    """Bring the entry's postings in line with its plainText, touching only changed terms."""
+    wanted = Counter(tokenize(entry.plainText))
+    existing = {
+        posting.term: posting
+        for posting in EntrySearchTerm.objects.filter(entry=entry).only("id", "term", "frequency")
+    }
+
+    stale = [posting.id for term, posting in existing.items() if term not in wanted]
+    changed = []
+    for term, frequency in wanted.items():
+        posting = existing.get(term)
+        if posting is not None and posting.frequency != frequency:
+            posting.frequency = frequency
+            changed.append(posting)
+    new = [
+        EntrySearchTerm(user_id=entry.user_id, entry=entry, term=term, frequency=frequency)
+        for term, frequency in wanted.items()
+        if term not in existing
+    ]
+
+    if stale:
+        EntrySearchTerm.objects.filter(id__in=stale).delete()
+    if changed:
+        EntrySearchTerm.objects.bulk_update(changed, ["frequency"], batch_size=500)
+    if new:
+        EntrySearchTerm.objects.bulk_create(new, batch_size=500)
+
+
+def term_prefix(term: str) -> Q:
+    # a range rather than LIKE 'term%', so the (user, term) index serves it on
+    # every backend (sqlite never uses an index for LIKE ... ESCAPE)
+    upper = term[:-1] + chr(ord(term[-1]) + 1)
+    return Q(term__gte=term, term__lt=upper)
+
+
+def search_entries(entries, search: str, user_id):
+    """Restrict an Entry queryset to entries matching every query term, ranked by score.
+
+    Each query term matches indexed terms by prefix, so partially typed words
+    still find results. Matching entries are found from the user's postings
+    through the (user, term) index, so the cost follows the number of hits
+    rather than the size of the journal. The queryset gets a ``search_score``
+    annotation.
+    """
+    terms = list(dict.fromkeys(tokenize(search)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return entries.none()
+
+    any_term = Q()
+    for term in terms:
+        any_term |= term_prefix(term)
+    matches = (
+        EntrySearchTerm.objects.filter(any_term, user_id=user_id)
+        .values("entry_id")
+        .annotate(
+            **{
+                f"hits_{i}": Count("id", filter=term_prefix(term))
+                for i, term in enumerate(terms)
+            }
+        )
+        .filter(**{f"hits_{i}__gt": 0 for i in range(len(terms))})
+    )
+    scores = (
+        EntrySearchTerm.objects.filter(any_term, entry_id=OuterRef("pk"))
+        .values("entry_id")
+        .annotate(score=Sum("frequency"))
+        .values("score")
+    )
+    return entries.filter(id__in=matches.values("entry_id")).annotate(
+        search_score=Subquery(scores)
+    )
@@ -1,3 +1,309 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from diff_match_patch import diff_match_patch
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from reflectionsBE.etags import unquote_etag
+from reflectionsBE.presign import url_epoch
+from reflectionsBE.testing import (
+    QueryPlanAssertions,
+    authenticated_client,
+    shared_cache,
+)
+
+from .fields import RAW_MARKER, ZLIB_MARKER
+from .models import Entry, EntryRevision, JournalDailyStat, JournalStreak
+from .revisions import append_revision, compact_entry
+from .search import index_entry_terms, search_entries
+from .utils import (
+    apply_derived_fields,
+    bump_daily_stat,
+    entry_day,
+    get_streaks,
+    record_streak_day,
+    release_streak_day,
+)
+
+
+class EntryListIndexTests(QueryPlanAssertions, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="a@example.com", password="pw")
+        other = User.objects.create_user(username="b@example.com", password="pw")
+        Entry.objects.bulk_create(
+            Entry(user=user, entryContent=f"<p>{i}</p>")
+            for i in range(50)
+            for user in (cls.user, other)
+        )
+
+    def test_every_whitelisted_ordering_is_index_backed(self):
+        expected = {
+            "-lastUpdated": "entry_user_lastupdated_idx",
+            "lastUpdated": "entry_user_lastupdated_idx",
+            "-createdAt": "entry_user_createdat_idx",
+            "createdAt": "entry_user_createdat_idx",
+        }
+        self.assertEqual(set(expected), set(Entry.ORDERINGS))
+        for sort, index_name in expected.items():
+            with self.subTest(sort=sort):
+                queryset = Entry.objects.filter(user=self.user).order_by(
+                    *Entry.ORDERINGS[sort]
+                )[:8]
+                self.assertUsesIndex(queryset, index_name)
+
+
+class CompactEntryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="c@example.com", password="pw")
+        self.entry = apply_derived_fields(
+            Entry(user=self.user, entryContent="<p>today was fine</p>")
+        )
+        self.entry.save()
+        bump_daily_stat(
+            self.user.id, entry_day(self.entry), 1, self.entry.wordCount, self.entry.letterCount
+        )
+
+    def append_edit(self, old, new):
+        dmp = diff_match_patch()
+        append_revision(self.entry.id, dmp.patch_toText(dmp.patch_make(old, new)))
+
+    def test_compacting_twice_applies_patches_once(self):
+        self.append_edit("<p>today was fine</p>", "<p>today was really fine</p>")
+        compact_entry(self.entry.id)
+        self.assertIsNone(compact_entry(self.entry.id))
+
+        entry = Entry.objects.get(id=self.entry.id)
+        self.assertEqual(entry.entryContent, "<p>today was really fine</p>")
+        self.assertEqual(entry.wordCount, 4)
+        stat = JournalDailyStat.objects.get(user=self.user)
+        self.assertEqual((stat.entryCount, stat.wordCount), (1, 4))
+        self.assertFalse(EntryRevision.objects.filter(compacted=False).exists())
+
+
+class SearchEntriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="s@example.com", password="pw")
+        other = User.objects.create_user(username="t@example.com", password="pw")
+        texts = ["<p>morning run by the river</p>", "<p>rainy morning</p>", "<p>river walk</p>"]
+        for user in (cls.user, other):
+            for text in texts * 10:
+                entry = apply_derived_fields(Entry(user=user, entryContent=text))
+                entry.save()
+                index_entry_terms(entry)
+
+    def search(self, text):
+        return search_entries(Entry.objects.filter(user=self.user), text, self.user.id)
+
+    def test_every_term_must_match_by_prefix(self):
+        results = self.search("morn riv")
+        self.assertEqual(results.count(), 10)
+        self.assertTrue(all(entry.search_score == 2 for entry in results))
+
+    def test_matches_are_resolved_from_the_postings_index(self):
+        queryset = self.search("morn riv").order_by(
+            "-search_score", *Entry.ORDERINGS["-lastUpdated"]
+        )
+        plan = queryset.explain()
+        self.assertIn("journal_search_user_term", plan)
+        # entries are fetched by id, not by walking the user's whole journal
+        self.assertNotIn("entry_user_lastupdated_idx", plan)
+        self.assertNotIn("entry_user_createdat_idx", plan)
+
+
+class StreakTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="d@example.com", password="pw")
+        self.start = date(2026, 3, 2)
+
+    def write(self, offset):
+        day = self.start + timedelta(days=offset)
+        bump_daily_stat(self.user.id, day, 1)
+        record_streak_day(self.user.id, day)
+
+    def delete(self, offset):
+        day = self.start + timedelta(days=offset)
+        bump_daily_stat(self.user.id, day, -1)
+        release_streak_day(self.user.id, day)
+
+    def streak(self):
+        streak = JournalStreak.objects.get(user=self.user)
+        return streak.currentStreak, streak.longestStreak, streak.lastEntryDay
+
+    def test_first_entry_starts_a_streak(self):
+        self.write(0)
+        self.assertEqual(self.streak(), (1, 1, self.start))
+
+    def test_consecutive_days_extend_the_streak(self):
+        for offset in range(3):
+            self.write(offset)
+        self.assertEqual(self.streak(), (3, 3, self.start + timedelta(days=2)))
+
+    def test_second_entry_on_the_same_day_changes_nothing(self):
+        self.write(0)
+        self.write(0)
+        self.assertEqual(self.streak(), (1, 1, self.start))
+
+    def test_gap_restarts_the_streak_and_keeps_the_longest(self):
+        for offset in (0, 1, 3):
+            self.write(offset)
+        self.assertEqual(self.streak(), (1, 2, self.start + timedelta(days=3)))
+
+    def test_deleting_the_last_entry_of_a_day_shortens_the_streak(self):
+        for offset in (0, 1, 1):
+            self.write(offset)
+        self.delete(1)
+        self.assertEqual(self.streak(), (2, 2, self.start + timedelta(days=1)))
+        self.delete(1)
+        self.assertEqual(self.streak(), (1, 1, self.start))
+
+    def test_current_streak_only_counts_when_it_reaches_today(self):
+        self.start = timezone.localdate() - timedelta(days=1)
+        self.write(0)
+        self.assertEqual(get_streaks(self.user), {"current_streak": 0, "longest_streak": 1})
+        self.write(1)
+        self.assertEqual(get_streaks(self.user), {"current_streak": 2, "longest_streak": 2})
+
+
+class CompressedTextFieldTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="e@example.com", password="pw")
+
+    def column_sql(self, template):
+        return template.format(
+            table=connection.ops.quote_name(Entry._meta.db_table),
+            column=connection.ops.quote_name("entryContent"),
+        )
+
+    def stored_bytes(self, entry):
+        with connection.cursor() as cursor:
+            cursor.execute(self.column_sql("SELECT {column} FROM {table} WHERE id = %s"), [entry.id])
+            return bytes(cursor.fetchone()[0])
+
+    def round_trip(self, content):
+        entry = Entry.objects.create(user=self.user, entryContent=content)
+        self.assertEqual(Entry.objects.get(id=entry.id).entryContent, content)
+        return self.stored_bytes(entry)
+
+    def test_short_content_is_stored_raw(self):
+        stored = self.round_trip("<p>kurz, café ☕</p>")
+        self.assertEqual(stored, RAW_MARKER + "<p>kurz, café ☕</p>".encode())
+
+    def test_long_content_is_compressed(self):
+        content = "<p>the same paragraph again and again</p>" * 100
+        stored = self.round_trip(content)
+        self.assertEqual(stored[:1], ZLIB_MARKER)
+        self.assertLess(len(stored), len(content))
+
+    def test_legacy_rows_without_a_marker_are_read_as_utf8(self):
+        entry = Entry.objects.create(user=self.user, entryContent="<p>new</p>")
+        legacy = "<p>written before compression</p>".encode()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.column_sql("UPDATE {table} SET {column} = %s WHERE id = %s"),
+                [connection.Database.Binary(legacy), entry.id],
+            )
+        self.assertEqual(
+            Entry.objects.get(id=entry.id).entryContent, "<p>written before compression</p>"
+        )
+
+
+@shared_cache
+class EntryListResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["responses"].clear()
+        self.user = User.objects.create_user(username="f@example.com", password="pw")
+        self.client = authenticated_client(self.user)
+        self.client.post("/api/journal/createEntry/", {"content": "<p>first</p>"}, format="json")
+
+    def list_entries(self, **headers):
+        return self.client.get("/api/journal/getAllEntries/", **headers)
+
+    def test_second_request_is_served_from_the_cache(self):
+        first = self.list_entries()
+        self.assertEqual(first["X-Cache"], "MISS")
+        second = self.list_entries()
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+
+        revalidated = self.list_entries(HTTP_IF_NONE_MATCH=second["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["X-Cache"], "HIT")
+
+    def test_query_params_get_their_own_page(self):
+        self.list_entries()
+        response = self.client.get("/api/journal/getAllEntries/?sort=createdAt")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_entry_writes_invalidate_the_list(self):
+        self.list_entries()
+        self.client.post("/api/journal/createEntry/", {"content": "<p>second</p>"}, format="json")
+        response = self.list_entries()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["total_entries"], 2)
+
+        entry_id = response.json()["entries"][0]["id"]
+        dmp = diff_match_patch()
+        patch = dmp.patch_toText(dmp.patch_make("<p>second</p>", "<p>second edit</p>"))
+        self.client.post(
+            "/api/journal/updateEntry/", {"entry_id": entry_id, "content": patch}, format="json"
+        )
+        response = self.list_entries()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["entries"][0]["content"], "second edit")
+
+        self.client.delete(f"/api/journal/deleteEntry/?entry_id={entry_id}")
+        response = self.list_entries()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["total_entries"], 1)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_disabled_without_a_shared_cache(self):
+        self.list_entries()
+        self.assertNotIn("X-Cache", self.list_entries())
+
+
+class EntryConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="g@example.com", password="pw")
+        self.client = authenticated_client(self.user)
+        self.entry = apply_derived_fields(Entry(user=self.user, entryContent="<p>draft</p>"))
+        self.entry.save()
+
+    def get_entry(self, **headers):
+        return self.client.get(f"/api/journal/getEntryById/?entry_id={self.entry.id}", **headers)
+
+    def update(self, old, new, **headers):
+        dmp = diff_match_patch()
+        return self.client.post(
+            "/api/journal/updateEntry/",
+            {"entry_id": self.entry.id, "content": dmp.patch_toText(dmp.patch_make(old, new))},
+            format="json",
+            **headers,
+        )
+
+    def test_entry_etag_carries_the_url_epoch(self):
+        response = self.get_entry()
+        self.assertTrue(unquote_etag(response["ETag"]).endswith(f"-{url_epoch()}"))
+        self.assertEqual(self.get_entry(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_if_match_ignores_the_epoch(self):
+        base = unquote_etag(self.get_entry()["ETag"]).split("-")[0]
+        response = self.update("<p>draft</p>", "<p>draft 2</p>", HTTP_IF_MATCH=f'"{base}-0"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_stale_if_match_is_rejected(self):
+        stale = self.get_entry()["ETag"]
+        current = self.update("<p>draft</p>", "<p>draft 2</p>", HTTP_IF_MATCH=stale)
+        self.assertEqual(current.status_code, 200)
+
+        response = self.update("<p>draft</p>", "<p>other tab</p>", HTTP_IF_MATCH=stale)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response["ETag"], current["ETag"])
+        self.assertEqual(EntryRevision.objects.filter(entry=self.entry).count(), 1)
+        self.assertEqual(self.get_entry().json()["entryContent"], "<p>draft 2</p>")
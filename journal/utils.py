@@ -1,140 +1,129 @@
-import os
-import boto3
-from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
-from rest_framework_simplejwt.tokens import AccessToken
-from .models import Entry
+from reflectionsBE.storage import get_storage
+from .models import Entry, JournalDailyStat, JournalStreak
+from .analyzer import analyze_html, rewrite_img_srcs
+from django.db.models import F, Q, Sum
 from django.utils import timezone
 from datetime import timedelta
 
 
-load_dotenv()
-s3_client = boto3.client("s3", region_name=os.getenv("AWS_REGION"))
-BUCKET_NAME = os.getenv("AWS_S3_BUCKET_NAME")
+def refresh_all_img_urls(html_content: str) -> str:
+    return rewrite_img_srcs(html_content, refresh_presigned_url)
 
 
-def html_to_text(html_content: str) -> str:
-    soup = BeautifulSoup(html_content, "html.parser")
-    return soup.get_text(" ", strip=True)
+DERIVED_FIELDS = ["title", "plainText", "imgKey", "wordCount", "letterCount"]
 
 
-def generate_title(entryContent: str):
-    soup = BeautifulSoup(entryContent, "html.parser")
-    heading = soup.find(["h1", "h2", "h3", "h4", "h5", "h6"])
-    title = heading.get_text(strip=True) if heading else "Untitled"
-    return title
+def derive_entry_fields(html_content: str) -> dict:
+    # one parse per write; the result is stored on the Entry row
+    analysis = analyze_html(html_content)
+    img_src = analysis.first_img_src
+    return {
+        "title": analysis.title[:255],
+        "plainText": analysis.text,
+        "imgKey": extract_object_key(img_src) if img_src else None,
+        "wordCount": analysis.word_count,
+        "letterCount": analysis.letter_count,
+    }
 
 
-def generate_img_url(entryContent: str):
-    soup = BeautifulSoup(entryContent, "html.parser")
-    img = soup.find("img")
-    url = img["src"] if img and img.has_attr("src") else None
-    if url != None:
-        return refresh_presigned_url(url)
-    return None
+def apply_derived_fields(entry: Entry) -> Entry:
+    for field, value in derive_entry_fields(entry.entryContent).items():
+        setattr(entry, field, value)
+    return entry
 
 
-def refresh_all_img_urls(html_content: str) -> str:
-    soup = BeautifulSoup(html_content, "html.parser")
-    imgs = soup.find_all("img")
+def extract_object_key(url: str):
+    return get_storage().key_from_url(url)
 
-    for img in imgs:
-        if img.has_attr("src"):
-            old_url = img["src"]
-            try:
-                img["src"] = refresh_presigned_url(old_url)
-            except Exception as e:
-                print(f"Could not refresh {old_url}: {e}")
 
-    return str(soup)
+def refresh_presigned_url(url: str):
+    return presigned_url_for_key(extract_object_key(url))
 
 
-def extract_object_key(url: str):
-    parsed_url = urlparse(url)
-    return parsed_url.path.lstrip("/")
+def presigned_url_for_key(object_key: str):
+    return get_storage().presigned_url(object_key)
 
 
-def refresh_presigned_url(url: str):
-    object_key = extract_object_key(url)
-    presigned_url = s3_client.generate_presigned_url(
-        "get_object",
-        Params={
-            "Bucket": BUCKET_NAME,
-            "Key": object_key,
-        },
-        ExpiresIn=3600,
+# Daily rollup maintenance, called by the entry views inside their transaction
+def bump_daily_stat(user_id, day, entries=0, words=0, letters=0):
+    stat, _ = JournalDailyStat.objects.get_or_create(user_id=user_id, day=day)
+    JournalDailyStat.objects.filter(pk=stat.pk).update(
+        entryCount=F("entryCount") + entries,
+        wordCount=F("wordCount") + words,
+        letterCount=F("letterCount") + letters,
     )
-    return presigned_url
 
 
-def get_user_id_from_request(request):
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
-        access_token = AccessToken(token)
-        return access_token["user_id"]
-    return None
+def entry_day(entry: Entry):
+    return timezone.localdate(entry.createdAt)
 
 
 # Functions for entry_stats API
 # week starts on monday and ends on sunday
+def get_week_range():
+    today = timezone.localdate()
+    start_of_week = today - timedelta(days=today.weekday())
+    return start_of_week, start_of_week + timedelta(days=6)
+
+
+def sum_daily_stats(user, **filters):
+    totals = JournalDailyStat.objects.filter(user=user, **filters).aggregate(
+        entries=Sum("entryCount"),
+        words=Sum("wordCount"),
+        letters=Sum("letterCount"),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def get_week_totals(user):
+    try:
+        return sum_daily_stats(user, day__range=get_week_range())
+    except Exception as e:
+        print(f"Error in get_week_totals: {e}")
+        return {"entries": 0, "words": 0, "letters": 0}
+
+
+def get_entry_counts(user):
+    # one filtered aggregate over the rollup instead of a COUNT per period
+    today = timezone.localdate()
+    start_of_week, end_of_week = get_week_range()
+    totals = JournalDailyStat.objects.filter(user=user).aggregate(
+        total=Sum("entryCount"),
+        this_week=Sum("entryCount", filter=Q(day__range=(start_of_week, end_of_week))),
+        this_month=Sum("entryCount", filter=Q(day__gte=today.replace(day=1))),
+        this_year=Sum("entryCount", filter=Q(day__gte=today.replace(month=1, day=1))),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
 def get_total_entries(user):
     try:
-        return Entry.objects.filter(user=user).count() or 0
+        return get_entry_counts(user)["total"]
     except Exception:
         return 0
 
 
 def get_entries_this_week(user):
-    try:
-        today = timezone.localdate()
-        start_of_week = today - timedelta(days=today.weekday())
-        end_of_week = start_of_week + timedelta(days=6)
-
-        return Entry.objects.filter(
-            user=user,
-            createdAt__date__range=(start_of_week, end_of_week)
-        ).count() or 0
-    except Exception as e:
-        print("Error in get_entries_this_week:", e)
-        return 0
+    return get_week_totals(user)["entries"]
 
 
 def get_entries_this_month(user):
     try:
-        today = timezone.now().date()
-        start_of_month = today.replace(day=1)
-        return (
-            Entry.objects.filter(
-                user=user, createdAt__date__gte=start_of_month
-            ).count()
-            or 0
-        )
+        return get_entry_counts(user)["this_month"]
     except Exception:
         return 0
 
 
 def get_entries_this_year(user):
     try:
-        today = timezone.now().date()
-        start_of_year = today.replace(month=1, day=1)
-        return (
-            Entry.objects.filter(user=user, createdAt__date__gte=start_of_year).count()
-            or 0
-        )
+        return get_entry_counts(user)["this_year"]
     except Exception:
         return 0
 
 
 def get_total_words(user):
     try:
-        entries = Entry.objects.filter(user=user).values_list("entryContent", flat=True)
-        total_words = 0
-        for entry in entries:
-            text = html_to_text(entry or "")
-            total_words += len(text.split())
-        return total_words
+        return sum_daily_stats(user)["words"]
     except Exception as e:
         print(f"Error in get_total_words: {e}")
         return 0
@@ -142,84 +131,86 @@ def get_total_words(user):
 
 def get_total_letters(user):
     try:
-        entries = Entry.objects.filter(user=user).values_list("entryContent", flat=True)
-        total_letters = 0
-        for entry in entries:
-            text = html_to_text(entry or "")
-            total_letters += len(text.replace(" ", ""))
-        return total_letters
+        return sum_daily_stats(user)["letters"]
     except Exception as e:
         print(f"Error in get_total_letters: {e}")
         return 0
 
 
 def get_total_words_this_week(user):
-    try:
-        now = timezone.now()
-        week_start = now - timedelta(days=now.weekday())  # Monday of this week
-        entries = Entry.objects.filter(user=user, createdAt__gte=week_start).values_list("entryContent", flat=True)
-        total_words = 0
-        for entry in entries:
-            text = html_to_text(entry or "")
-            total_words += len(text.split())
-        return total_words
-    except Exception as e:
-        print(f"Error in get_total_words_this_week: {e}")
-        return 0
+    return get_week_totals(user)["words"]
 
 
 def get_total_letters_this_week(user):
-    try:
-        now = timezone.now()
-        week_start = now - timedelta(days=now.weekday())
-        entries = Entry.objects.filter(user=user, createdAt__gte=week_start).values_list("entryContent", flat=True)
-        total_letters = 0
-        for entry in entries:
-            text = html_to_text(entry or "")
-            total_letters += len(text.replace(" ", ""))
-        return total_letters
-    except Exception as e:
-        print(f"Error in get_total_letters_this_week: {e}")
-        return 0
+    return get_week_totals(user)["letters"]
+
+
+def recompute_streak(user_id):
+    # full walk over the user's active days, only needed when history changes
+    # behind the end of the streak (first use, deletes, backdated entries)
+    days = (
+        JournalDailyStat.objects.filter(user_id=user_id, entryCount__gt=0)
+        .order_by("day")
+        .values_list("day", flat=True)
+    )
+    current = longest = 0
+    last_day = None
+    for day in days:
+        if last_day is not None and (day - last_day).days == 1:
+            current += 1
+        else:
+            current = 1
+        longest = max(longest, current)
+        last_day = day
+
+    streak, _ = JournalStreak.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            "currentStreak": current,
+            "longestStreak": longest,
+            "lastEntryDay": last_day,
+        },
+    )
+    return streak
+
+
+def record_streak_day(user_id, day):
+    streak = JournalStreak.objects.select_for_update().filter(user_id=user_id).first()
+    if streak is None or (streak.lastEntryDay and day < streak.lastEntryDay):
+        return recompute_streak(user_id)
+    if streak.lastEntryDay == day:
+        return streak
+
+    if streak.lastEntryDay and (day - streak.lastEntryDay).days == 1:
+        streak.currentStreak += 1
+    else:
+        streak.currentStreak = 1
+    streak.longestStreak = max(streak.longestStreak, streak.currentStreak)
+    streak.lastEntryDay = day
+    streak.save(update_fields=["currentStreak", "longestStreak", "lastEntryDay"])
+    return streak
+
+
+def release_streak_day(user_id, day):
+    remaining = (
+        JournalDailyStat.objects.filter(user_id=user_id, day=day)
+        .values_list("entryCount", flat=True)
+        .first()
+    )
+    if not remaining:
+        recompute_streak(user_id)
 
 
 def get_streaks(user):
     try:
-        entry_dates = (
-            Entry.objects.filter(user=user)
-            .dates("createdAt", "day", order="ASC")
-        )
-
-        if not entry_dates:
-            return {"current_streak": 0, "longest_streak": 0}
-        #compute longest streak
-        longest_streak = 1
-        current_streak = 1
-        temp_streak = 1
-        today = timezone.now().date()
-        last_date = entry_dates[0]
-
-        for entry_date in entry_dates[1:]:
-            if (entry_date - last_date).days == 1:
-                temp_streak += 1
-            else:
-                temp_streak = 1
-
-            if temp_streak > longest_streak:
-                longest_streak = temp_streak
-
-            last_date = entry_date
-
-        # Compute current streak ending today
-        streak_today = 0
-        for i, entry_date in enumerate(reversed(entry_dates)):
-            expected_date = today - timedelta(days=i)
-            if entry_date == expected_date:
-                streak_today += 1
-            else:
-                break
-
-        return {"current_streak": streak_today, "longest_streak": longest_streak}
+        streak = JournalStreak.objects.filter(user=user).first()
+        if streak is None:
+            streak = recompute_streak(user.id)
+
+        # the current streak only counts if it reaches today
+        today = timezone.localdate()
+        current_streak = streak.currentStreak if streak.lastEntryDay == today else 0
+        return {"current_streak": current_streak, "longest_streak": streak.longestStreak}
 
     except Exception as e:
         print(f"Error in get_streaks: {e}")
@@ -227,36 +218,18 @@ def get_streaks(user):
 
 
 def get_average_words_per_entry_this_week(user):
-    try:
-        entries = Entry.objects.filter(user=user).values_list("entryContent", flat=True)
-        total_entries = entries.count()
-        if total_entries == 0:
-            return 0
-
-        total_words = 0
-        for entry in entries:
-            text = html_to_text(entry or "")
-            total_words += len(text.split())
-
-        return total_words / total_entries
-    except Exception as e:
-        print(f"Error in get_average_words_per_entry: {e}")
+    totals = get_week_totals(user)
+    if totals["entries"] == 0:
         return 0
+    return totals["words"] / totals["entries"]
 
 
 def get_average_letters_per_entry(user):
     try:
-        entries = Entry.objects.filter(user=user).values_list("entryContent", flat=True)
-        total_entries = entries.count()
-        if total_entries == 0:
+        totals = sum_daily_stats(user)
+        if totals["entries"] == 0:
             return 0
-
-        total_letters = 0
-        for entry in entries:
-            text = html_to_text(entry or "")
-            total_letters += len(text.replace(" ", ""))
-
-        return total_letters / total_entries
+        return totals["letters"] / totals["entries"]
     except Exception as e:
         print(f"Error in get_average_letters_per_entry: {e}")
-        return 0
\ No newline at end of file
+        return 0
@@ -2,43 +2,168 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
+from django.views.decorators.http import condition
 from .models import Entry
 from rest_framework import status
 from .serializers import EntrySerializer
-from diff_match_patch import diff_match_patch
+from .search import index_entry_terms, search_entries
+from .revisions import (
+    COMPACT_AFTER,
+    append_revision,
+    compact_entry,
+    compact_pending_for_user,
+    latest_revision_id,
+    parse_patch,
+)
 import urllib
 from journal.utils import (
-    generate_title,
-    generate_img_url,
-    html_to_text,
+    apply_derived_fields,
+    bump_daily_stat,
+    entry_day,
+    get_week_totals,
+    sum_daily_stats,
+    record_streak_day,
+    release_streak_day,
+    presigned_url_for_key,
     refresh_all_img_urls,
-    get_user_id_from_request,
-    get_entries_this_week,
-    get_total_letters_this_week,
-    get_total_words_this_week,
-    get_average_words_per_entry_this_week,
-    get_average_letters_per_entry,
-    get_total_letters_this_week,
     get_streaks,
 )
+from reflectionsBE.authentication import get_user_id_from_request
 import traceback
-from django.db.models import Q
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from reflectionsBE.db_router import replica_reads
+from reflectionsBE.sharding import user_atomic
+from reflectionsBE.etags import (
+    if_match_fails,
+    make_etag,
+    query_fingerprint,
+    set_etag,
+    with_epoch,
+)
+from reflectionsBE.presign import url_epoch
+from reflectionsBE.response_cache import bump_user_version, cached_list_response
+from api.thumbnails import preview_keys
+from reflectionsBE.pagination import (
+    InvalidCursor,
+    InvalidSort,
+    KeysetPagination,
+    plan_ordering,
+    wants_cursor_pagination,
+    wants_total_count,
+)
 
 
 class JournalPagination(PageNumberPagination):
     page_size = 8
 
 
+def entries_version(user):
+    # pending autosaves are compacted first so they are reflected in lastUpdated
+    compact_pending_for_user(user)
+    summary = Entry.objects.filter(user=user).aggregate(
+        last=Max("lastUpdated"), count=Count("id")
+    )
+    return f"{summary['last']}:{summary['count']}"
+
+
+def entry_etag(entry_id):
+    # entry content only changes through the revision log, so the latest
+    # revision id identifies it whether or not it has been compacted yet
+    return make_etag("entry", entry_id, latest_revision_id(entry_id))
+
+
+def entry_version_etag(user_id, entry_id):
+    if not entry_id or not Entry.objects.filter(id=entry_id, user_id=user_id).exists():
+        return None
+    return entry_etag(entry_id)
+
+
+def list_entries_etag(request):
+    return with_epoch(
+        make_etag("entries", entries_version(request.user), query_fingerprint(request)),
+        url_epoch(),
+    )
+
+
+def get_entry_etag(request):
+    etag = entry_version_etag(request.user.id, request.query_params.get("entry_id"))
+    return with_epoch(etag, url_epoch()) if etag else None
+
+
+def entry_stats_etag(request):
+    return make_etag("entry_stats", entries_version(request.user), timezone.localdate())
+
+
+# list cards show a small preview; ?thumb=<px> asks for a different size
+LIST_THUMBNAIL_SIZE = 320
+
+
+def list_preview_keys(request, entries):
+    try:
+        size = int(request.query_params.get("thumb", LIST_THUMBNAIL_SIZE))
+    except ValueError:
+        size = LIST_THUMBNAIL_SIZE
+    return preview_keys([row["imgKey"] for row in entries if row["imgKey"]], size)
+
+
+# derived columns are kept current on write, so list pages read plain rows
+# and never load the HTML or build model instances
+ENTRY_LIST_FIELDS = ("id", "title", "plainText", "imgKey", "createdAt", "lastUpdated")
+
+
+def entry_list_item(row, previews):
+    img_key = row["imgKey"]
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "url": presigned_url_for_key(previews[img_key]) if img_key else None,
+        "content": row["plainText"],
+        "createdAt": row["createdAt"],
+        "lastUpdated": row["lastUpdated"],
+    }
+
+
+def list_entries_by_cursor(request, entries, sort, search):
+    if search:
+        raise InvalidCursor("Cursor pagination is not available for ranked search")
+    paginator = KeysetPagination(sort, page_size=JournalPagination.page_size)
+    result_page = paginator.paginate_queryset(
+        entries.values(*ENTRY_LIST_FIELDS), request.query_params.get("cursor")
+    )
+    previews = list_preview_keys(request, result_page)
+    data = {
+        "success": True,
+        "next_cursor": paginator.next_cursor,
+        "prev_cursor": paginator.prev_cursor,
+        "entries": [entry_list_item(entry, previews) for entry in result_page],
+    }
+    if wants_total_count(request):
+        # served from the daily rollup instead of COUNT(*) over entries
+        data["total_entries"] = sum_daily_stats(request.user)["entries"]
+    return Response(data, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@replica_reads
+@cached_list_response("entries", extra=url_epoch)
+@condition(etag_func=list_entries_etag)
 def list_entries_api(request):
     try:
         sort = request.query_params.get("sort", "-lastUpdated")
         search = request.query_params.get("search", "")
+        # pending revisions were already compacted by list_entries_etag
         entries = Entry.objects.filter(user=request.user)
+        if wants_cursor_pagination(request):
+            return list_entries_by_cursor(request, entries, sort, search)
+        ordering = plan_ordering(sort, Entry.ORDERINGS)
         if search:
-            entries = entries.filter(entryContent__icontains=search)
-        entries = entries.order_by(sort)
+            entries = search_entries(entries, search, request.user.id).order_by(
+                "-search_score", *ordering
+            )
+        else:
+            entries = entries.order_by(*ordering)
         paginator = JournalPagination()
         page_num = int(request.query_params.get("page", 1))
         total_entries = entries.count()
@@ -52,27 +177,11 @@ def list_entries_api(request):
         request.GET["page"] = str(page_num)
         request.GET._mutable = False
 
+        entries = entries.values(*ENTRY_LIST_FIELDS)
         result_page = paginator.paginate_queryset(entries, request)
-        serializer = EntrySerializer(result_page, many=True)
-
-        custom_entries = []
-        for entry in serializer.data:
-            content = entry.get("entryContent", "")
-            createdAt = entry.get("createdAt", "")
-            lastUpdated = entry.get("lastUpdated", "")
-            title = generate_title(content)
-            url = generate_img_url(content)
-            text = html_to_text(content)
-            custom_entries.append(
-                {
-                    "id": entry["id"],
-                    "title": title,
-                    "url": url,
-                    "content": text,
-                    "createdAt": createdAt,
-                    "lastUpdated": lastUpdated,
-                }
-            )
+
+        previews = list_preview_keys(request, result_page)
+        custom_entries = [entry_list_item(entry, previews) for entry in result_page]
 
         return Response(
             {
@@ -88,6 +197,8 @@ def list_entries_api(request):
             status=status.HTTP_200_OK,
         )
 
+    except (InvalidCursor, InvalidSort) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         traceback.print_exc()
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -104,7 +215,15 @@ def create_entry_content(request):
         )
 
     try:
-        entry = Entry.objects.create(user=request.user, entryContent=content)
+        entry = Entry(user=request.user, entryContent=content)
+        apply_derived_fields(entry)
+        with user_atomic(entry.user_id):
+            entry.save()
+            bump_daily_stat(
+                entry.user_id, entry_day(entry), 1, entry.wordCount, entry.letterCount
+            )
+            record_streak_day(entry.user_id, entry_day(entry))
+            index_entry_terms(entry)
         if entry.user != request.user:
             entry.delete()
             return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
@@ -127,27 +246,50 @@ def update_entry_content(request):
         )
 
     user_id = get_user_id_from_request(request)
-
-    try:
-        entry = Entry.objects.get(id=entry_id, user_id=user_id)
-    except Entry.DoesNotExist:
-        return Response(
-            {"error": "Entry not found or not owned by user"},
-            status=status.HTTP_404_NOT_FOUND,
-        )
-
     patch_text = urllib.parse.unquote(patch_text)
-    oldHTML = entry.entryContent
 
-    dmp = diff_match_patch()
     try:
-        patches = dmp.patch_fromText(patch_text)
-        newHTML, _ = dmp.patch_apply(patches, oldHTML)
+        parse_patch(patch_text)
+    except ValueError:
+        return Response({"error": "Invalid patch"}, status=status.HTTP_400_BAD_REQUEST)
 
-        entry.entryContent = newHTML
-        entry.save()
-        return Response({"msg": "Success"}, status=status.HTTP_200_OK)
+    try:
+        with user_atomic(user_id):
+            # lock the entry so another session can't append between the
+            # If-Match check and our revision
+            locked = (
+                Entry.objects.select_for_update()
+                .filter(id=entry_id, user_id=user_id)
+                .values_list("id", flat=True)
+                .first()
+            )
+            if locked is None:
+                return Response(
+                    {"error": "Entry not found or not owned by user"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            etag = entry_etag(entry_id)
+            if if_match_fails(request, etag):
+                return set_etag(
+                    Response(
+                        {"error": "Entry was changed by another session"},
+                        status=status.HTTP_412_PRECONDITION_FAILED,
+                    ),
+                    etag,
+                )
+            pending = append_revision(entry_id, patch_text)
+
+        # the entry row is only rewritten when the log is compacted
+        if pending >= COMPACT_AFTER:
+            compact_entry(entry_id)
+        # appending a revision doesn't save the Entry, so no signal fires
+        bump_user_version(user_id)
+        return set_etag(
+            Response({"msg": "Success"}, status=status.HTTP_200_OK),
+            entry_etag(entry_id),
+        )
     except Exception:
+        traceback.print_exc()
         return Response(
             {"error": "Unable to save"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
@@ -155,6 +297,8 @@ def update_entry_content(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@replica_reads
+@condition(etag_func=get_entry_etag)
 def get_entry_by_id(request):
     try:
         entry_id = request.query_params.get("entry_id")
@@ -167,6 +311,7 @@ def get_entry_by_id(request):
 
         # Only fetch entry if it belongs to the logged-in user
         entry = Entry.objects.get(id=entry_id, user_id=user_id)
+        entry = compact_entry(entry.id) or entry
 
         serializer = EntrySerializer(entry)
         custom_entry_data = {
@@ -200,8 +345,15 @@ def delete_entry(request):
         user_id = get_user_id_from_request(request)
 
         # Only delete if entry belongs to this user
-        entry = Entry.objects.get(id=entry_id, user_id=user_id)
-        entry.delete()
+        entry = Entry.objects.defer("entryContent", "plainText").get(
+            id=entry_id, user_id=user_id
+        )
+        with user_atomic(entry.user_id):
+            entry.delete()
+            bump_daily_stat(
+                entry.user_id, entry_day(entry), -1, -entry.wordCount, -entry.letterCount
+            )
+            release_streak_day(entry.user_id, entry_day(entry))
 
         return Response({"message": "Entry deleted"}, status=status.HTTP_200_OK)
 
@@ -217,16 +369,20 @@ def delete_entry(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@replica_reads
+@condition(etag_func=entry_stats_etag)
 def entry_stats(request):
     try:
+        # pending revisions were already compacted by entry_stats_etag
         user = request.user
         streak_data = get_streaks(user)
+        week = get_week_totals(user)
         data = {
-            "entries_this_week": get_entries_this_week(user),
-            "total_words_this_week": get_total_words_this_week(user),
-            "total_letters_this_week": get_total_letters_this_week(user),
-            "average_words_per_entry_this_week": get_average_words_per_entry_this_week(
-                user
+            "entries_this_week": week["entries"],
+            "total_words_this_week": week["words"],
+            "total_letters_this_week": week["letters"],
+            "average_words_per_entry_this_week": (
+                week["words"] / week["entries"] if week["entries"] else 0
             ),
             "Current_streak":streak_data["current_streak"],
             "Longest_streak":streak_data["longest_streak"],
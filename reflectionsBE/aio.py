@@ -0,0 +1,76 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from reflectionsBE.authentication import CachedJWTAuthentication
+
+
+# boto3 and requests are blocking; the async views hand their calls to this
+# pool so the event loop keeps serving other requests while S3 answers.
+# It is bounded so a slow S3 cannot pile up unlimited threads per worker.
+S3_EXECUTOR_WORKERS = int(os.getenv("S3_EXECUTOR_WORKERS", "32"))
+ASYNC_STORAGE_VIEWS = os.getenv("ASYNC_STORAGE_VIEWS", "").lower() in ("1", "true")
+
+s3_executor = ThreadPoolExecutor(
+    max_workers=S3_EXECUTOR_WORKERS, thread_name_prefix="s3-io"
+)
+
+
+def _call_in_executor(fn, *args, **kwargs):
+    # executor threads never see request_finished, so expire their database
+    # connections around each call like a request would
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # carry the request's context vars (shard, write tracking) into the thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        s3_executor,
+        functools.partial(context.run, _call_in_executor, fn, *args, **kwargs),
+    )
+
+
+_authenticator = CachedJWTAuthentication()
+_authenticate = sync_to_async(_authenticator.authenticate)
+
+
+def _unauthorized(detail):
+    # same body and header DRF's exception handler would produce
+    data = detail if isinstance(detail, dict) else {"detail": detail}
+    response = JsonResponse(data, status=401)
+    response["WWW-Authenticate"] = _authenticator.authenticate_header(None)
+    return response
+
+
+def async_jwt_required(view):
+    """Async stand-in for ``@permission_classes([IsAuthenticated])``.
+
+    DRF's APIView is sync-only, so async views authenticate the bearer token
+    themselves and get ``request.user`` / ``request.auth`` set the same way.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await _authenticate(request)
+        except AuthenticationFailed as e:
+            return _unauthorized(e.detail)
+        if result is None:
+            return _unauthorized("Authentication credentials were not provided.")
+        request.user, request.auth = result
+        return await view(request, *args, **kwargs)
+
+    return wrapper
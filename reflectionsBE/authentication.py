@@ -0,0 +1,70 @@
+import copy
+import os
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from reflectionsBE.sharding import activate_user
+from reflectionsBE.ttl_cache import UserCache
+
+
+user_cache = UserCache(
+    maxsize=int(os.getenv("AUTH_USER_CACHE_SIZE", "1024")),
+    ttl=int(os.getenv("AUTH_USER_CACHE_TTL", "60")),
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves request.user from ``user_cache``.
+
+    The token is decoded and verified once by DRF and kept on ``request.auth``;
+    its claims are signed, so on a cache hit no query is needed and only the
+    checks a fresh load would make are repeated. Each request gets its own
+    copy of the cached user, so views can modify it freely.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            # every journal/task query after this is scoped to this user
+            activate_user(result[0].id)
+        return result
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+            return copy.copy(user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return copy.copy(user)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.evict(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+def get_user_id_from_request(request):
+    # DRF already verified the bearer token and kept it on request.auth,
+    # so read the claim instead of decoding the token a second time
+    token = getattr(request, "auth", None)
+    if token is None:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
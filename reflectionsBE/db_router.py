@@ -0,0 +1,122 @@
+import functools
+import os
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+
+REPLICA_DB_ALIAS = "replica"
+# how long a user's reads stay on the primary after they wrote something;
+# should cover the replica's usual lag
+REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+
+# set for the duration of a view decorated with @replica_reads
+_replica_allowed = ContextVar("replica_allowed", default=False)
+# set once the current request wrote to the primary
+_wrote = ContextVar("wrote_to_primary", default=None)
+
+
+def replica_pin_key(user_id) -> str:
+    return f"db_pin:{user_id}"
+
+
+def replica_configured() -> bool:
+    from django.conf import settings
+
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+class ReplicaRouter:
+    """Sends reads from @replica_reads views to the replica, everything else to default.
+
+    Once a request writes, or inside a transaction, its reads go back to the
+    primary so it always sees its own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_allowed.get() or not replica_configured():
+            return DEFAULT_DB_ALIAS
+        wrote = _wrote.get()
+        if (wrote and wrote[0]) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None:
+            wrote[0] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def replica_reads(view):
+    """Let a read-only view's queries go to the replica.
+
+    Users who wrote in the last REPLICA_PIN_SECONDS keep reading from the
+    primary, so a list fetched right after a save includes it. The pin lives
+    in the default cache, which must be shared when several workers run.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        user_id = getattr(request.user, "id", None)
+        if user_id is not None and cache.get(replica_pin_key(user_id)):
+            return view(request, *args, **kwargs)
+        token = _replica_allowed.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica_allowed.reset(token)
+
+    return wrapper
+
+
+def _pin_writer(request):
+    # DRF sets the authenticated user on the underlying request
+    user_id = getattr(getattr(request, "user", None), "id", None)
+    if _wrote.get()[0] and replica_configured() and user_id is not None:
+        return replica_pin_key(user_id)
+    return None
+
+
+@sync_and_async_middleware
+def replica_pin_middleware(get_response):
+    """Tracks whether a request wrote, and pins its user to the primary if so."""
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            # a list, so the router can flag it without resetting the ContextVar
+            token = _wrote.set([False])
+            try:
+                response = await get_response(request)
+                key = _pin_writer(request)
+                if key:
+                    await cache.aset(key, 1, REPLICA_PIN_SECONDS)
+                return response
+            finally:
+                _wrote.reset(token)
+
+    else:
+
+        def middleware(request):
+            token = _wrote.set([False])
+            try:
+                response = get_response(request)
+                key = _pin_writer(request)
+                if key:
+                    cache.set(key, 1, REPLICA_PIN_SECONDS)
+                return response
+            finally:
+                _wrote.reset(token)
+
+    return middleware
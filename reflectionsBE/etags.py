@@ -0,0 +1,38 @@
+import hashlib
+
+from django.utils.cache import quote_etag
+from django.utils.http import parse_etags
+
+
+def make_etag(*parts) -> str:
+    # unquoted, the form django.views.decorators.http.condition expects
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def set_etag(response, etag):
+    if etag:
+        response["ETag"] = quote_etag(etag)
+    return response
+
+
+def query_fingerprint(request) -> str:
+    return "&".join(f"{key}={value}" for key, value in sorted(request.query_params.items()))
+
+
+def with_epoch(etag, epoch) -> str:
+    # for payloads embedding presigned urls; If-Match only compares the part before "-"
+    return f"{etag}-{epoch}"
+
+
+def if_match_fails(request, etag) -> bool:
+    header = request.META.get("HTTP_IF_MATCH")
+    if not header:
+        return False
+    tags = parse_etags(header)
+    if "*" in tags:
+        return etag is None
+    return not any(unquote_etag(tag).split("-")[0] == etag for tag in tags)
+
+
+def unquote_etag(tag: str) -> str:
+    return tag.removeprefix("W/").strip('"')
@@ -0,0 +1,119 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class InvalidSort(ValueError):
+    pass
+
+
+def plan_ordering(sort, orderings):
+    """Map a client sort param onto an index-backed order_by tuple.
+
+    ``orderings`` is the endpoint's whitelist; anything else would make the
+    database sort the user's whole result set, so it is rejected.
+    """
+    if sort not in orderings:
+        raise InvalidSort(f"sort must be one of {', '.join(orderings)}")
+    return orderings[sort]
+
+
+class KeysetPagination:
+    """Cursor pagination on (timestamp, id), shared by the journal and task lists.
+
+    Pages are found with a range condition on the ordering columns instead of
+    OFFSET, so deep pages cost the same as the first one and no COUNT(*) is
+    needed. Cursors are opaque base64 tokens; clients just echo them back.
+    """
+
+    page_size = 10
+    # sort param -> (column, descending)
+    orderings = {
+        "-lastUpdated": ("lastUpdated", True),
+        "lastUpdated": ("lastUpdated", False),
+        "-createdAt": ("createdAt", True),
+        "createdAt": ("createdAt", False),
+    }
+
+    def __init__(self, sort, page_size=None):
+        if sort not in self.orderings:
+            raise InvalidCursor(
+                f"Cursor pagination supports sort in {', '.join(self.orderings)}"
+            )
+        self.field, self.descending = self.orderings[sort]
+        if page_size is not None:
+            self.page_size = page_size
+        self.next_cursor = None
+        self.prev_cursor = None
+
+    def encode_cursor(self, item, direction):
+        # pages are model instances, or dicts when the queryset uses values()
+        if isinstance(item, dict):
+            value, pk = item[self.field], item["id"]
+        else:
+            value, pk = getattr(item, self.field), item.pk
+        payload = {"v": value.isoformat(), "id": pk, "d": direction}
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            value = datetime.fromisoformat(payload["v"])
+            pk = int(payload["id"])
+            direction = payload["d"]
+        except (ValueError, KeyError, TypeError):
+            raise InvalidCursor("Invalid cursor")
+        if direction not in ("n", "p"):
+            raise InvalidCursor("Invalid cursor")
+        return value, pk, direction
+
+    def paginate_queryset(self, queryset, cursor=None):
+        direction = "n"
+        # walking backwards flips the ordering, then the page is reversed again
+        descending = self.descending
+        if cursor:
+            value, pk, direction = self.decode_cursor(cursor)
+            if direction == "p":
+                descending = not descending
+            op = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{op}": value})
+                | Q(**{self.field: value, f"pk__{op}": pk})
+            )
+
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}{self.field}", f"{prefix}pk")
+        items = list(queryset[: self.page_size + 1])
+        has_more = len(items) > self.page_size
+        items = items[: self.page_size]
+        if direction == "p":
+            items.reverse()
+
+        if items:
+            more_forward = has_more if direction == "n" else True
+            more_backward = bool(cursor) if direction == "n" else has_more
+            if more_forward:
+                self.next_cursor = self.encode_cursor(items[-1], "n")
+            if more_backward:
+                self.prev_cursor = self.encode_cursor(items[0], "p")
+        return items
+
+
+def wants_cursor_pagination(request):
+    # opt-in: ?pagination=cursor for the first page, then ?cursor=<token>
+    return (
+        request.query_params.get("pagination") == "cursor"
+        or "cursor" in request.query_params
+    )
+
+
+def wants_total_count(request):
+    return request.query_params.get("include_count", "").lower() in ("1", "true")
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import botocore.auth
+from botocore.auth import SIGV4_TIMESTAMP, S3SigV4QueryAuth
+
+
+PRESIGNED_URL_EXPIRES_IN = 3600
+# "rolling" signs with the current time, "window" pins the signing time to the
+# start of a fixed window so every url for a key is identical inside it
+PRESIGNED_URL_SIGNING = os.getenv("PRESIGNED_URL_SIGNING", "rolling")
+PRESIGNED_URL_WINDOW = int(os.getenv("PRESIGNED_URL_WINDOW", "3600"))
+WINDOWED_SIGNATURE_VERSION = "s3v4-windowed"
+
+
+def window_start(window, now=None):
+    now = time.time() if now is None else now
+    return int(now // window) * window
+
+
+class WindowedS3SigV4QueryAuth(S3SigV4QueryAuth):
+    window = PRESIGNED_URL_WINDOW
+
+    def _modify_request_before_signing(self, request):
+        # X-Amz-Date and the credential scope are both derived from this
+        signed_at = datetime.fromtimestamp(window_start(self.window), tz=timezone.utc)
+        request.context["timestamp"] = signed_at.strftime(SIGV4_TIMESTAMP)
+        super()._modify_request_before_signing(request)
+
+
+botocore.auth.AUTH_TYPE_MAPS[f"{WINDOWED_SIGNATURE_VERSION}-query"] = WindowedS3SigV4QueryAuth
+
+
+def choose_windowed_signer(signature_version=None, **kwargs):
+    # only presigned urls are pinned, regular API calls keep their signer
+    if signature_version and signature_version.endswith("-query"):
+        return f"{WINDOWED_SIGNATURE_VERSION}-query"
+    return None
+
+
+class PresignedUrlCache:
+    """Bounded LRU of presigned GET urls keyed by (bucket, object key).
+
+    A url is reused until ``safety_margin`` seconds before it expires, so a
+    client always gets at least that long to fetch it. With ``windowed`` set,
+    urls are signed at the start of the current PRESIGNED_URL_WINDOW, stay
+    valid for ``expires_in`` past the window end and ask browsers to
+    revalidate, so a cached image costs a 304 instead of a download.
+    """
+
+    def __init__(
+        self,
+        maxsize=4096,
+        expires_in=PRESIGNED_URL_EXPIRES_IN,
+        safety_margin=300,
+        windowed=False,
+    ):
+        self.maxsize = maxsize
+        self.expires_in = expires_in
+        self.safety_margin = safety_margin
+        self.window = PRESIGNED_URL_WINDOW if windowed else None
+        self.hits = 0
+        self.misses = 0
+        self._urls = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, client, bucket, key):
+        cache_key = (bucket, key)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._urls.get(cache_key)
+            if cached is not None and cached[1] > now:
+                self._urls.move_to_end(cache_key)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        # sign outside the lock, boto3 signing is the expensive part
+        if self.window:
+            url, reuse_until = self._sign_windowed(client, bucket, key, now)
+        else:
+            url = client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": bucket, "Key": key},
+                ExpiresIn=self.expires_in,
+            )
+            reuse_until = now + self.expires_in - self.safety_margin
+        with self._lock:
+            self._urls[cache_key] = (url, reuse_until)
+            self._urls.move_to_end(cache_key)
+            while len(self._urls) > self.maxsize:
+                self._urls.popitem(last=False)
+        return url
+
+    def _sign_windowed(self, client, bucket, key, now):
+        client.meta.events.register(
+            "choose-signer.s3.GetObject",
+            choose_windowed_signer,
+            unique_id="reflections-windowed-presign",
+        )
+        lifetime = self.window + self.expires_in
+        url = client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": bucket,
+                "Key": key,
+                # keys get overwritten (profile picture, re-uploads), so browsers
+                # keep the bytes but revalidate against S3's ETag on each use
+                "ResponseCacheControl": "private, no-cache",
+            },
+            ExpiresIn=lifetime,
+        )
+        # keep handing out the same url until the window rolls over
+        window_end = window_start(self.window) + self.window
+        return url, now + (window_end - time.time())
+
+    def invalidate(self, bucket, key):
+        with self._lock:
+            self._urls.pop((bucket, key), None)
+
+    def clear(self):
+        with self._lock:
+            self._urls.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._urls), "hits": self.hits, "misses": self.misses}
+
+
+presigned_url_cache = PresignedUrlCache(
+    maxsize=int(os.getenv("PRESIGNED_URL_CACHE_SIZE", "4096")),
+    safety_margin=int(os.getenv("PRESIGNED_URL_SAFETY_MARGIN", "300")),
+    windowed=PRESIGNED_URL_SIGNING == "window",
+)
+
+
+def presign_get_object(client, bucket, key):
+    return presigned_url_cache.get(client, bucket, key)
+
+
+def url_epoch():
+    # responses embedding presigned urls must not be revalidated past the
+    # point where the urls in them may have expired
+    if presigned_url_cache.window:
+        return window_start(presigned_url_cache.window)
+    return int(time.time() // presigned_url_cache.safety_margin)
@@ -0,0 +1,94 @@
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+RESPONSE_CACHE_ALIAS = "responses"
+
+
+def response_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def user_version_key(user_id) -> str:
+    return f"resp_ver:{user_id}"
+
+
+# the pages can stay in each worker's local memory, but the version counters
+# live in the default cache, which every worker must share, so a write is
+# seen by all of them
+def user_version(user_id) -> int:
+    key = user_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # start from the clock rather than 0, so a counter that was evicted
+        # can never come back to a version that still has pages cached
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    """Invalidate every cached response of this user; nothing is deleted."""
+    try:
+        cache.incr(user_version_key(user_id))
+    except ValueError:
+        # no counter yet, so nothing of this user's is cached either
+        pass
+
+
+def normalized_params(request) -> str:
+    params = request.query_params
+    return "&".join(
+        f"{key}={value}" for key in sorted(params) for value in sorted(params.getlist(key))
+    )
+
+
+def cached_list_response(endpoint, extra=None):
+    """Cache a GET view's 200 responses per (user, endpoint, query params).
+
+    Keys embed the user's version counter, which Entry and Task writes bump,
+    so with a shared default cache no worker serves a page after the data it
+    shows has changed; stale versions just age out. ``extra`` adds request independent state to the
+    key, such as the presigned url epoch. Responses carry ``X-Cache``.
+    Off (the view runs as is) unless settings.RESPONSE_CACHE_ENABLED.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return view(request, *args, **kwargs)
+            user_id = request.user.id
+            params = hashlib.sha1(normalized_params(request).encode()).hexdigest()
+            extra_key = extra() if extra else ""
+            key = f"resp:{user_id}:{user_version(user_id)}:{endpoint}:{extra_key}:{params}"
+            pages = response_cache()
+
+            cached = pages.get(key)
+            if cached is not None:
+                data, etag = cached
+                if etag and etag in parse_etags(request.headers.get("If-None-Match", "")):
+                    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                else:
+                    response = Response(data, status=status.HTTP_200_OK)
+                if etag:
+                    response["ETag"] = etag
+                response["X-Cache"] = "HIT"
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                pages.set(key, (response.data, response.get("ETag")))
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -38,6 +38,8 @@ ALLOWED_HOSTS = []
 INSTALLED_APPS = [
     "journal",
     "tasks",
+    "users",
+    "api",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -48,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "reflectionsBE.sharding.shard_middleware",
+    "reflectionsBE.db_router.replica_pin_middleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -81,6 +85,10 @@ WSGI_APPLICATION = "reflectionsBE.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# connections are kept open across requests and pinged before reuse, instead
+# of a new TCP + auth handshake to the MySQL host on every request
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+
 DATABASES = {
     # this is for local only
     "default": {
@@ -90,7 +98,72 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# optional read replica, used by the views marked @replica_reads
+if os.getenv("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("DB_REPLICA_HOST"),
+        "PORT": os.getenv("DB_REPLICA_PORT", os.getenv("DB_PORT")),
+        "USER": os.getenv("DB_REPLICA_USER", os.getenv("DB_USER")),
+        "PASSWORD": os.getenv("DB_REPLICA_PASSWORD", os.getenv("DB_PASSWORD")),
+        "TEST": {"MIRROR": "default"},
     }
+
+# Extra shards for journal and task rows, as "alias=host[:port],...". Each
+# uses the default credentials and database name; default stays shard 0 and
+# holds everything else. Shards must hand out disjoint ids (MySQL
+# auto_increment_offset/increment) so move_user_shard can keep primary keys.
+DB_SHARDS = ["default"]
+for spec in filter(None, os.getenv("DB_SHARD_HOSTS", "").split(",")):
+    alias, _, address = spec.partition("=")
+    host, _, port = address.partition(":")
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"DEPENDENCIES": ["default"]},
+    }
+    DB_SHARDS.append(alias)
+
+DATABASE_ROUTERS = [
+    "reflectionsBE.sharding.ShardRouter",
+    "reflectionsBE.db_router.ReplicaRouter",
+]
+
+
+# Caches
+# "default" holds state every worker must agree on, such as the replica
+# read-after-write pins and the response cache versions. Local memory is per
+# process, so with several workers point CACHE_BACKEND/CACHE_LOCATION at a
+# shared cache (django.core.cache.backends.redis.RedisCache, redis://...).
+# "responses" holds the per-user list pages (reflectionsBE/response_cache.py);
+# it is only switched on with a shared default cache, because per-process
+# version counters would let other workers serve lists a write made stale.
+
+LOCMEM_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", LOCMEM_CACHE)
+SHARED_CACHE = CACHE_BACKEND != LOCMEM_CACHE
+RESPONSE_CACHE_ENABLED = SHARED_CACHE and os.getenv(
+    "RESPONSE_CACHE_ENABLED", "1"
+).lower() in ("1", "true")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    },
+    "responses": {
+        "BACKEND": os.getenv("RESPONSE_CACHE_BACKEND", LOCMEM_CACHE)
+        if RESPONSE_CACHE_ENABLED
+        else "django.core.cache.backends.dummy.DummyCache",
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", "responses"),
+        "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TTL", "300")),
+    },
 }
 
 
@@ -142,8 +215,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # for jwt
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "reflectionsBE.authentication.CachedJWTAuthentication",
     ),
+    # rest_framework isn't an installed app, so the browsable API has no templates
+    "DEFAULT_RENDERER_CLASSES": ("reflectionsBE.renderers.FastJSONRenderer",),
 }
 
 SIMPLE_JWT = {
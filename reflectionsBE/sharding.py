@@ -0,0 +1,165 @@
+import os
+import zlib
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from reflectionsBE.ttl_cache import UserCache
+
+
+# apps whose rows all belong to one user and can live on that user's shard;
+# everything else (auth, users, api) stays on default, which is also shard 0
+SHARDED_APPS = {"journal", "tasks"}
+
+# (user_id, alias) for the request being served
+_current = ContextVar("user_shard", default=None)
+
+# (alias, locked) per user, so authenticating a request costs no query.
+# move_user_shard waits out this ttl after locking a user, so every worker
+# has seen the lock before rows are copied
+SHARD_CACHE_TTL = int(os.getenv("DB_SHARD_CACHE_TTL", "5"))
+shard_cache = UserCache(
+    maxsize=int(os.getenv("DB_SHARD_CACHE_SIZE", "4096")), ttl=SHARD_CACHE_TTL
+)
+
+
+class ShardLocked(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Your data is being moved, please retry in a moment."
+    default_code = "shard_locked"
+
+
+def shard_aliases():
+    return getattr(settings, "DB_SHARDS", [DEFAULT_DB_ALIAS])
+
+
+def sharding_enabled() -> bool:
+    return len(shard_aliases()) > 1
+
+
+def initial_shard(user_id) -> str:
+    # only used the first time a user is seen; after that UserShard is the map
+    aliases = shard_aliases()
+    return aliases[zlib.crc32(str(user_id).encode()) % len(aliases)]
+
+
+def lookup_shard(user_id, for_request=False):
+    from users.models import UserShard
+
+    cached = shard_cache.get(user_id)
+    if cached is None:
+        shard, _ = UserShard.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            user_id=user_id, defaults={"alias": initial_shard(user_id)}
+        )
+        cached = (shard.alias, shard.locked)
+        shard_cache.set(user_id, cached)
+    alias, locked = cached
+    if for_request and locked:
+        raise ShardLocked()
+    return alias
+
+
+def activate_user(user_id):
+    """Bind the rest of this request's journal/task queries to the user's shard."""
+    if sharding_enabled():
+        _current.set((user_id, lookup_shard(user_id, for_request=True)))
+
+
+def user_db(user_id=None) -> str:
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+    current = _current.get()
+    if user_id is None or (current and current[0] == user_id):
+        return current[1] if current else DEFAULT_DB_ALIAS
+    return lookup_shard(user_id)
+
+
+def user_atomic(user_id=None):
+    # views wrap multi-row writes in this instead of a bare atomic(), which
+    # would only cover default
+    return transaction.atomic(using=user_db(user_id))
+
+
+class ShardRouter:
+    """Routes journal and task models to the owning user's shard.
+
+    Saved instances carry their user, everything else uses the user activated
+    by authentication for this request. Returns None for other apps, so the
+    next router decides.
+    """
+
+    def _db(self, model, **hints):
+        if model._meta.app_label not in SHARDED_APPS or not sharding_enabled():
+            return None
+        instance = hints.get("instance")
+        if isinstance(instance, User):
+            # assigning request.user to a new row; the user itself is on default
+            return user_db(instance.pk)
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return user_db(getattr(instance, "user_id", None))
+
+    db_for_read = _db
+    db_for_write = _db
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # user foreign keys cross from a shard to default on purpose
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not sharding_enabled():
+            return None
+        if app_label in SHARDED_APPS:
+            return db in shard_aliases()
+        if db != DEFAULT_DB_ALIAS and db in shard_aliases():
+            return False
+        return None
+
+
+@sync_and_async_middleware
+def shard_middleware(get_response):
+    # authentication activates the user; this keeps it from outliving the request
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            token = _current.set(None)
+            try:
+                return await get_response(request)
+            finally:
+                _current.reset(token)
+
+    else:
+
+        def middleware(request):
+            token = _current.set(None)
+            try:
+                return get_response(request)
+            finally:
+                _current.reset(token)
+
+    return middleware
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_rows(sender, instance, using, **kwargs):
+    # the cascade from auth_user only reaches rows on the same database
+    if not sharding_enabled():
+        return
+    alias = lookup_shard(instance.pk)
+    if alias == using:
+        return
+    from journal.models import Entry, JournalDailyStat, JournalStreak
+    from tasks.models import Task
+
+    with transaction.atomic(using=alias):
+        for model in (Entry, JournalDailyStat, JournalStreak, Task):
+            model.objects.using(alias).filter(user_id=instance.pk).delete()
@@ -0,0 +1,201 @@
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote, unquote, urlparse
+
+import boto3
+from boto3.exceptions import Boto3Error
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from dotenv import load_dotenv
+
+from reflectionsBE.presign import presign_get_object, presigned_url_cache
+
+
+load_dotenv()
+# "s3" in production; "local" keeps objects under LOCAL_STORAGE_ROOT for
+# offline tests and benchmarks
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", "media")
+
+# One pool per process, sized for the async views' S3 executor plus the
+# background thumbnail and provisioning threads
+S3_CONFIG = Config(
+    region_name=os.getenv("AWS_REGION"),
+    max_pool_connections=int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50")),
+    connect_timeout=float(os.getenv("S3_CONNECT_TIMEOUT", "3")),
+    read_timeout=float(os.getenv("S3_READ_TIMEOUT", "20")),
+    retries={"total_max_attempts": int(os.getenv("S3_MAX_ATTEMPTS", "3")), "mode": "standard"},
+    tcp_keepalive=True,
+)
+
+# what callers catch, whichever backend is configured
+STORAGE_ERRORS = (ClientError, BotoCoreError, Boto3Error, OSError)
+
+
+class S3Storage:
+    """The bucket behind every upload, with one lazily built, shared client."""
+
+    def __init__(self, bucket, config=S3_CONFIG):
+        self.bucket = bucket
+        self.config = config
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = boto3.client(
+                        "s3",
+                        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                        config=self.config,
+                    )
+        return self._client
+
+    def upload_fileobj(self, key, fileobj, content_type=None):
+        extra = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(fileobj, self.bucket, key, ExtraArgs=extra)
+        # overwriting a key must not keep handing out the url of the old object
+        presigned_url_cache.invalidate(self.bucket, key)
+
+    def put_object(self, key, body=b"", content_type=None, cache_control=None):
+        params = {"Bucket": self.bucket, "Key": key, "Body": body}
+        if content_type:
+            params["ContentType"] = content_type
+        if cache_control:
+            params["CacheControl"] = cache_control
+        self.client.put_object(**params)
+        presigned_url_cache.invalidate(self.bucket, key)
+
+    def read(self, key) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        presigned_url_cache.invalidate(self.bucket, key)
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        # DeleteObjects takes at most 1000 keys per call
+        for start in range(0, len(keys), 1000):
+            batch = keys[start : start + 1000]
+            self.client.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": [{"Key": key} for key in batch]}
+            )
+        for key in keys:
+            presigned_url_cache.invalidate(self.bucket, key)
+
+    def list_objects(self, prefix):
+        # every page, yielding {"Key", "Size", "LastModified"}
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            yield from page.get("Contents", [])
+
+    def presigned_url(self, key):
+        return presign_get_object(self.client, self.bucket, key)
+
+    def key_from_url(self, url):
+        parsed = urlparse(url)
+        path = unquote(parsed.path.lstrip("/"))
+        # path-style urls (s3.<region>.amazonaws.com/<bucket>/<key>)
+        virtual_host = parsed.netloc.startswith(f"{self.bucket}.")
+        if not virtual_host and path.startswith(f"{self.bucket}/"):
+            path = path[len(self.bucket) + 1 :]
+        return path
+
+
+class LocalStorage:
+    """Same API as S3Storage, backed by a directory; urls are file:// urls."""
+
+    def __init__(self, root, base_url=None):
+        self.root = Path(root).resolve()
+        self.bucket = str(self.root)
+        self.base_url = base_url or self.root.as_uri() + "/"
+
+    def _path(self, key):
+        path = (self.root / key).resolve()
+        if path != self.root and self.root not in path.parents:
+            raise ValueError(f"Key escapes the storage root: {key}")
+        return path
+
+    def upload_fileobj(self, key, fileobj, content_type=None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename, so readers never see half a file
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+            shutil.copyfileobj(fileobj, tmp)
+        os.replace(tmp.name, path)
+
+    def put_object(self, key, body=b"", content_type=None, cache_control=None):
+        if key.endswith("/"):
+            # folder marker
+            self._path(key).mkdir(parents=True, exist_ok=True)
+            return
+        if isinstance(body, str):
+            body = body.encode()
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+            tmp.write(body)
+        os.replace(tmp.name, path)
+
+    def read(self, key) -> bytes:
+        return self._path(key).read_bytes()
+
+    def delete(self, key):
+        # S3 deletes are idempotent, so missing files are fine here too
+        self._path(key).unlink(missing_ok=True)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def list_objects(self, prefix):
+        if not self.root.exists():
+            return
+        for path in sorted(self.root.rglob("*")):
+            key = path.relative_to(self.root).as_posix()
+            if path.is_file() and key.startswith(prefix):
+                stat = path.stat()
+                yield {
+                    "Key": key,
+                    "Size": stat.st_size,
+                    "LastModified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                }
+
+    def presigned_url(self, key):
+        return self.base_url + quote(key)
+
+    def key_from_url(self, url):
+        url = url.split("?", 1)[0]
+        if url.startswith(self.base_url):
+            return unquote(url[len(self.base_url) :])
+        return unquote(urlparse(url).path.lstrip("/"))
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def build_storage(backend=STORAGE_BACKEND):
+    if backend == "local":
+        return LocalStorage(LOCAL_STORAGE_ROOT)
+    if backend == "s3":
+        return S3Storage(os.getenv("AWS_S3_BUCKET_NAME"))
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}")
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = build_storage()
+    return _storage
+
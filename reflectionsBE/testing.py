@@ -0,0 +1,38 @@
+from django.test import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+# plan fragments that mean the database sorted rows itself
+SORT_MARKERS = ("filesort", "TEMP B-TREE")
+
+
+class QueryPlanAssertions:
+    """TestCase mixin for checking a queryset's EXPLAIN output."""
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        for marker in SORT_MARKERS:
+            self.assertNotIn(marker, plan)
+
+
+def authenticated_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+
+# the response and stats caches only run with a shared default cache; in
+# tests one process is every "worker", so local memory stands in for it
+shared_cache = override_settings(
+    SHARED_CACHE=True,
+    RESPONSE_CACHE_ENABLED=True,
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "responses": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "responses",
+        },
+    },
+)
@@ -0,0 +1,39 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """Small in-process LRU cache with a TTL, keyed by user id (User rows, shard map)."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            cached = self._users.get(key)
+            if cached is None or cached[1] <= time.monotonic():
+                self._users.pop(key, None)
+                return None
+            self._users.move_to_end(key)
+            return cached[0]
+
+    def set(self, user_id, value):
+        key = str(user_id)
+        with self._lock:
+            self._users[key] = (value, time.monotonic() + self.ttl)
+            self._users.move_to_end(key)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
@@ -3,12 +3,37 @@ from django.contrib.auth.models import User
 
 # Create your models here.
 class Task(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tasks")
+    # no FK constraint: auth_user is on default, these rows may be on a shard
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="tasks", db_constraint=False
+    )
     description = models.TextField()
     status = models.CharField(max_length=50, default="pending")
     dueDate = models.DateField(null=True, blank=True)
     createdAt = models.DateTimeField(auto_now_add=True)
     lastUpdated = models.DateTimeField(auto_now=True)
 
+    # every list query filters by user and orders by one of these
+    ORDERINGS = {
+        "-lastUpdated": ("-lastUpdated", "-id"),
+        "lastUpdated": ("lastUpdated", "id"),
+        "-createdAt": ("-createdAt", "-id"),
+        "createdAt": ("createdAt", "id"),
+        "status": ("status", "lastUpdated", "id"),
+        "-status": ("-status", "-lastUpdated", "-id"),
+        "dueDate": ("dueDate", "id"),
+        "-dueDate": ("-dueDate", "-id"),
+    }
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "lastUpdated"], name="task_user_lastupdated_idx"),
+            models.Index(fields=["user", "createdAt"], name="task_user_createdat_idx"),
+            models.Index(
+                fields=["user", "status", "lastUpdated"], name="task_user_status_upd_idx"
+            ),
+            models.Index(fields=["user", "dueDate"], name="task_user_duedate_idx"),
+        ]
+
     def __str__(self):
         return f"Task {self.id} - {self.status}"
\ No newline at end of file
@@ -1,7 +1,10 @@
 from rest_framework import serializers
 from .models import Task
 
+# also what the list endpoint reads with values()
+TASK_FIELDS = ['id', 'description', 'status', 'dueDate', 'createdAt', 'lastUpdated']
+
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
-        fields = ['id', 'description', 'status', 'dueDate', 'createdAt', 'lastUpdated']
\ No newline at end of file
+        fields = TASK_FIELDS
@@ -1,3 +1,221 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
 from django.test import TestCase
 
-# Create your tests here.
+from reflectionsBE.response_cache import user_version
+from reflectionsBE.testing import (
+    QueryPlanAssertions,
+    authenticated_client,
+    shared_cache,
+)
+
+from .models import Task
+
+
+class TaskListIndexTests(QueryPlanAssertions, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="a@example.com", password="pw")
+        other = User.objects.create_user(username="b@example.com", password="pw")
+        statuses = ["pending", "in_progress", "completed"]
+        Task.objects.bulk_create(
+            Task(user=user, description=f"task {i}", status=statuses[i % 3])
+            for i in range(60)
+            for user in (cls.user, other)
+        )
+
+    def test_every_whitelisted_ordering_is_index_backed(self):
+        expected = {
+            "-lastUpdated": "task_user_lastupdated_idx",
+            "lastUpdated": "task_user_lastupdated_idx",
+            "-createdAt": "task_user_createdat_idx",
+            "createdAt": "task_user_createdat_idx",
+            "status": "task_user_status_upd_idx",
+            "-status": "task_user_status_upd_idx",
+            "dueDate": "task_user_duedate_idx",
+            "-dueDate": "task_user_duedate_idx",
+        }
+        self.assertEqual(set(expected), set(Task.ORDERINGS))
+        for sort, index_name in expected.items():
+            with self.subTest(sort=sort):
+                queryset = Task.objects.filter(user=self.user).order_by(
+                    *Task.ORDERINGS[sort]
+                )[:35]
+                self.assertUsesIndex(queryset, index_name)
+
+    def test_status_filter_uses_status_index(self):
+        queryset = Task.objects.filter(user=self.user, status="pending").order_by(
+            *Task.ORDERINGS["-lastUpdated"]
+        )[:35]
+        self.assertUsesIndex(queryset, "task_user_status_upd_idx")
+
+
+@shared_cache
+class TaskListResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["responses"].clear()
+        self.user = User.objects.create_user(username="c@example.com", password="pw")
+        self.client = authenticated_client(self.user)
+        self.task = Task.objects.create(user=self.user, description="first")
+
+    def get_tasks(self, **headers):
+        return self.client.get("/api/tasks/get_tasks/", **headers)
+
+    def assertMiss(self):
+        response = self.get_tasks()
+        self.assertEqual(response["X-Cache"], "MISS")
+        return response.json()["tasks"]
+
+    def test_second_request_is_served_from_the_cache(self):
+        first = self.get_tasks()
+        self.assertEqual(first["X-Cache"], "MISS")
+        second = self.get_tasks()
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(self.get_tasks(HTTP_IF_NONE_MATCH=second["ETag"]).status_code, 304)
+
+    def test_task_writes_invalidate_the_list(self):
+        self.get_tasks()
+        self.client.post("/api/tasks/add_task/", {"description": "second"}, format="json")
+        self.assertEqual(len(self.assertMiss()), 2)
+
+        self.client.put(
+            f"/api/tasks/update_task/{self.task.id}/", {"status": "completed"}, format="json"
+        )
+        statuses = {task["id"]: task["status"] for task in self.assertMiss()}
+        self.assertEqual(statuses[self.task.id], "completed")
+
+        self.client.put(
+            "/api/tasks/bulk_update_tasks/",
+            {"ids": [self.task.id], "status": "pending"},
+            format="json",
+        )
+        statuses = {task["id"]: task["status"] for task in self.assertMiss()}
+        self.assertEqual(statuses[self.task.id], "pending")
+
+        self.client.delete(f"/api/tasks/delete_task/{self.task.id}/")
+        self.assertEqual(len(self.assertMiss()), 1)
+
+
+class TaskStatsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="d@example.com", password="pw")
+        self.client = authenticated_client(self.user)
+        self.task = Task.objects.create(user=self.user, description="first")
+
+    def get_stats(self, **headers):
+        return self.client.get("/api/tasks/get_task_stats/", **headers)
+
+    def complete_task(self):
+        self.client.put(
+            f"/api/tasks/update_task/{self.task.id}/", {"status": "completed"}, format="json"
+        )
+
+    @shared_cache
+    def test_cached_stats_cost_no_queries(self):
+        self.assertEqual(self.get_stats().json()["total_tasks_completed"], 0)
+        with self.assertNumQueries(0):
+            cached = self.get_stats()
+        self.assertEqual(cached.json()["total_tasks_completed"], 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_stats(HTTP_IF_NONE_MATCH=cached["ETag"]).status_code, 304)
+
+        self.complete_task()
+        fresh = self.get_stats()
+        self.assertNotEqual(fresh["ETag"], cached["ETag"])
+        self.assertEqual(fresh.json()["total_tasks_completed"], 1)
+
+    def test_stats_are_not_cached_without_a_shared_cache(self):
+        self.get_stats()
+        self.complete_task()
+        with self.assertNumQueries(2):
+            stats = self.get_stats().json()
+        self.assertEqual(stats["total_tasks_completed"], 1)
+
+
+class TaskConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="e@example.com", password="pw")
+        self.client = authenticated_client(self.user)
+        created = self.client.post("/api/tasks/add_task/", {"description": "first"}, format="json")
+        self.task_id = created.json()["task"]["id"]
+        self.etag = created["ETag"]
+
+    def update(self, data, **headers):
+        return self.client.put(
+            f"/api/tasks/update_task/{self.task_id}/", data, format="json", **headers
+        )
+
+    def test_unchanged_list_revalidates_to_304(self):
+        etag = self.client.get("/api/tasks/get_tasks/")["ETag"]
+        response = self.client.get("/api/tasks/get_tasks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_stale_if_match_is_rejected(self):
+        current = self.update({"status": "in_progress"}, HTTP_IF_MATCH=self.etag)
+        self.assertEqual(current.status_code, 200)
+
+        response = self.update({"status": "completed"}, HTTP_IF_MATCH=self.etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response["ETag"], current["ETag"])
+        self.assertEqual(Task.objects.get(id=self.task_id).status, "in_progress")
+
+
+class BulkTaskTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="h@example.com", password="pw")
+        self.client = authenticated_client(self.user)
+        self.tasks = Task.objects.bulk_create(
+            Task(user=self.user, description=f"task {i}") for i in range(3)
+        )
+        other = User.objects.create_user(username="i@example.com", password="pw")
+        self.foreign = Task.objects.create(user=other, description="not mine")
+
+    def test_bulk_add_reports_each_item(self):
+        version = user_version(self.user.id)
+        response = self.client.post(
+            "/api/tasks/bulk_add_tasks/",
+            {"tasks": [{"description": "a"}, {"status": "nope"}, {"description": "c"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body["created"], 2)
+        self.assertEqual([r["success"] for r in body["results"]], [True, False, True])
+        self.assertIn("description", body["results"][1]["errors"])
+        for result, description in zip(body["results"][::2], ["a", "c"]):
+            task = Task.objects.get(id=result["task"]["id"], user=self.user)
+            self.assertEqual(task.description, description)
+            self.assertEqual(result["task"]["description"], description)
+        self.assertEqual(user_version(self.user.id), version + 1)
+
+    def test_bulk_update_reports_missing_and_foreign_ids(self):
+        ids = [self.tasks[0].id, self.foreign.id, 999999]
+        response = self.client.put(
+            "/api/tasks/bulk_update_tasks/", {"ids": ids, "status": "completed"}, format="json"
+        )
+        body = response.json()
+        self.assertEqual(body["updated"], 1)
+        self.assertEqual([r["success"] for r in body["results"]], [True, False, False])
+        self.assertEqual(Task.objects.get(id=self.tasks[0].id).status, "completed")
+        self.assertEqual(Task.objects.get(id=self.foreign.id).status, "pending")
+
+    def test_bulk_delete_reports_missing_and_foreign_ids(self):
+        ids = [self.tasks[1].id, self.foreign.id]
+        response = self.client.delete(
+            "/api/tasks/bulk_delete_tasks/", {"ids": ids}, format="json"
+        )
+        body = response.json()
+        self.assertEqual(body["deleted"], 1)
+        self.assertEqual([r["success"] for r in body["results"]], [True, False])
+        self.assertFalse(Task.objects.filter(id=self.tasks[1].id).exists())
+        self.assertTrue(Task.objects.filter(id=self.foreign.id).exists())
+
+    def test_bad_selection_is_rejected(self):
+        response = self.client.put(
+            "/api/tasks/bulk_update_tasks/", {"ids": ["x"], "status": "completed"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
@@ -1,5 +1,14 @@
 from django.urls import path
-from .views import get_tasks, add_task, update_task, delete_task, get_task_stats
+from .views import (
+    get_tasks,
+    add_task,
+    update_task,
+    delete_task,
+    get_task_stats,
+    bulk_add_tasks,
+    bulk_update_tasks,
+    bulk_delete_tasks,
+)
 
 urlpatterns = [
     path("get_tasks/", get_tasks, name="get_tasks"),
@@ -7,4 +16,7 @@ urlpatterns = [
     path("update_task/<int:task_id>/", update_task, name="update_task"),
     path("delete_task/<int:task_id>/", delete_task, name="delete_task"),
     path("get_task_stats/", get_task_stats, name="get_task_stats"),
+    path("bulk_add_tasks/", bulk_add_tasks, name="bulk_add_tasks"),
+    path("bulk_update_tasks/", bulk_update_tasks, name="bulk_update_tasks"),
+    path("bulk_delete_tasks/", bulk_delete_tasks, name="bulk_delete_tasks"),
 ]
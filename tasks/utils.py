@@ -1,46 +1,114 @@
-from datetime import date, timedelta
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
 from django.utils import timezone
+from reflectionsBE.etags import make_etag
+from reflectionsBE.response_cache import user_version
 from .models import Task
 
 
-def get_tasks_completed_this_week(user):
-    try:
-        today = timezone.now().date()
-        # week starts on monday and ends on sunday
-        start_of_week = today - timedelta(days=today.weekday())
-        end_of_week = start_of_week + timedelta(days=6)
-        return user.tasks.filter(
-            status="completed", lastUpdated__date__range=(start_of_week, end_of_week)
-        ).count()
-    except Exception as e:
-        print(f"Error in get_tasks_completed_this_week: {e}")
-        return 0
-
-
-def get_tasks_in_progress(user):
-    try:
-        return user.tasks.filter(status="in_progress").count()
-    except Exception as e:
-        print(f"Error in get_tasks_in_progress: {e}")
-        return 0
-
-
-def get_tasks_due_this_week(user):
-    try:
-        today = timezone.now().date()
-        start_of_week = today - timedelta(days=today.weekday())
-        end_of_week = start_of_week + timedelta(days=6)
-        return user.tasks.filter(
-            dueDate__range=(start_of_week, end_of_week)
-        ).count()
-    except Exception as e:
-        print(f"Error in get_tasks_due_this_week: {e}")
-        return 0
-
-
-def get_total_tasks_completed(user):
-    try:
-        return user.tasks.filter(status="completed").count()
-    except Exception as e:
-        print(f"Error in get_total_tasks_completed: {e}")
-        return 0
\ No newline at end of file
+# entries for old versions are never read again and just expire
+TASK_STATS_CACHE_TTL = int(os.getenv("TASK_STATS_CACHE_TTL", "60"))
+
+
+def get_week_range():
+    # week starts on monday and ends on sunday
+    today = timezone.localdate()
+    start_of_week = today - timedelta(days=today.weekday())
+    return start_of_week, start_of_week + timedelta(days=6)
+
+
+def tasks_version(user):
+    summary = Task.objects.filter(user=user).aggregate(
+        last=Max("lastUpdated"), count=Count("id")
+    )
+    return f"{summary['last']}:{summary['count']}"
+
+
+def task_stats_version(user):
+    """What the stats ETag and cache key are built from.
+
+    With a shared cache that is the per-user counter every task write bumps,
+    read without a query. Local memory isn't shared between workers, so
+    there the tasks' own MAX/COUNT is used and the stats aren't cached.
+    """
+    if settings.SHARED_CACHE:
+        return f"v{user_version(user.id)}"
+    return tasks_version(user)
+
+
+def task_stats_cache_key(user_id, version):
+    # the date makes "this week" figures roll over on their own
+    return f"task_stats:{user_id}:{make_etag(version, timezone.localdate())}"
+
+
+def get_task_stats_for_user(user, version=None):
+    key = None
+    if settings.SHARED_CACHE:
+        key = task_stats_cache_key(user.id, version or task_stats_version(user))
+        stats = cache.get(key)
+        if stats is not None:
+            return stats
+
+    week = get_week_range()
+    stats = Task.objects.filter(user=user).aggregate(
+        tasks_completed_this_week=Count(
+            "id", filter=Q(status="completed", lastUpdated__date__range=week)
+        ),
+        tasks_in_progress=Count("id", filter=Q(status="in_progress")),
+        tasks_due_this_week=Count("id", filter=Q(dueDate__range=week)),
+        total_tasks_completed=Count("id", filter=Q(status="completed")),
+    )
+    if key:
+        cache.set(key, stats, TASK_STATS_CACHE_TTL)
+    return stats
+
+
+# Helpers for the bulk task endpoints
+MAX_BULK_TASKS = 500
+
+
+class BulkSelectionError(ValueError):
+    pass
+
+
+def select_tasks_for_bulk(user, data):
+    """Resolve a bulk request body to a queryset of the user's tasks.
+
+    Accepts either {"ids": [...]} or {"filter": {"status": ..., "overdue": true}}.
+    """
+    ids = data.get("ids")
+    filters = data.get("filter")
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise BulkSelectionError("ids must be a non-empty list")
+        if len(ids) > MAX_BULK_TASKS:
+            raise BulkSelectionError(f"At most {MAX_BULK_TASKS} ids per request")
+        try:
+            ids = [int(task_id) for task_id in ids]
+        except (TypeError, ValueError):
+            raise BulkSelectionError("ids must be integers")
+        return user.tasks.filter(id__in=ids), ids
+
+    if not isinstance(filters, dict) or not filters:
+        raise BulkSelectionError("Provide ids or a filter")
+    tasks = user.tasks.all()
+    if filters.get("status"):
+        tasks = tasks.filter(status=filters["status"])
+    if filters.get("overdue"):
+        tasks = tasks.filter(dueDate__lt=timezone.localdate()).exclude(status="completed")
+    return tasks, None
+
+
+def bulk_results(requested_ids, matched_ids, error):
+    matched = set(matched_ids)
+    if requested_ids is None:
+        return [{"id": task_id, "success": True} for task_id in matched_ids]
+    return [
+        {"id": task_id, "success": True}
+        if task_id in matched
+        else {"id": task_id, "success": False, "error": error}
+        for task_id in requested_ids
+    ]
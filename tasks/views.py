@@ -3,16 +3,32 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view
+from django.utils import timezone
+from django.views.decorators.http import condition
+from reflectionsBE.db_router import replica_reads
+from reflectionsBE.response_cache import bump_user_version, cached_list_response
+from reflectionsBE.sharding import user_atomic
+from reflectionsBE.etags import if_match_fails, make_etag, query_fingerprint, set_etag
 from .models import Task
-from .serializers import TaskSerializer
+from .serializers import TASK_FIELDS, TaskSerializer
 from rest_framework import status
 import traceback
+from reflectionsBE.pagination import (
+    InvalidCursor,
+    InvalidSort,
+    KeysetPagination,
+    plan_ordering,
+    wants_cursor_pagination,
+    wants_total_count,
+)
 from .utils import (
-    get_tasks_completed_this_week,
-    get_tasks_in_progress,
-    get_tasks_due_this_week,
-    get_total_tasks_completed,
+    MAX_BULK_TASKS,
+    BulkSelectionError,
+    bulk_results,
+    select_tasks_for_bulk,
+    get_task_stats_for_user,
+    task_stats_version,
+    tasks_version,
 )
 
 
@@ -20,8 +36,42 @@ class TaskPagination(PageNumberPagination):
     page_size = 35
 
 
+def task_etag(task):
+    return make_etag("task", task.id, task.lastUpdated.isoformat())
+
+
+def get_tasks_etag(request):
+    return make_etag("tasks", tasks_version(request.user), query_fingerprint(request))
+
+
+def task_stats_etag(request):
+    # kept on the request so the view doesn't look the version up again
+    request.task_stats_version = task_stats_version(request.user)
+    # "this week" figures roll over with the date even when no task changes
+    return make_etag("task_stats", request.task_stats_version, timezone.localdate())
+
+
+def get_tasks_by_cursor(request, tasks, sort):
+    paginator = KeysetPagination(sort, page_size=TaskPagination.page_size)
+    result_page = paginator.paginate_queryset(
+        tasks.values(*TASK_FIELDS), request.query_params.get("cursor")
+    )
+    data = {
+        "success": True,
+        "next_cursor": paginator.next_cursor,
+        "prev_cursor": paginator.prev_cursor,
+        "tasks": result_page,
+    }
+    if wants_total_count(request):
+        data["total_entries"] = tasks.count()
+    return Response(data, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@replica_reads
+@cached_list_response("tasks")
+@condition(etag_func=get_tasks_etag)
 def get_tasks(request):
     try:
         sort = request.query_params.get("sort", "-lastUpdated")
@@ -32,7 +82,9 @@ def get_tasks(request):
             tasks = tasks.filter(description__icontains=search)
         if status_filter:
             tasks = tasks.filter(status=status_filter)
-        tasks = tasks.order_by(sort)
+        if wants_cursor_pagination(request):
+            return get_tasks_by_cursor(request, tasks, sort)
+        tasks = tasks.order_by(*plan_ordering(sort, Task.ORDERINGS))
 
         paginator = TaskPagination()
         page_num = int(request.query_params.get("page", 1))
@@ -51,8 +103,8 @@ def get_tasks(request):
         request.GET["page"] = str(page_num)
         request.GET._mutable = False
 
-        result_page = paginator.paginate_queryset(tasks, request)
-        serializer = TaskSerializer(result_page, many=True)
+        # plain rows, rendered as is; TaskSerializer is only needed for writes
+        result_page = paginator.paginate_queryset(tasks.values(*TASK_FIELDS), request)
 
         return Response(
             {
@@ -62,12 +114,17 @@ def get_tasks(request):
                 "current_page": page_num,
                 "next_page": paginator.get_next_link(),
                 "prev_page": paginator.get_previous_link(),
-                "tasks": serializer.data,
+                "tasks": result_page,
                 "clamped": page_num == last_page,
             },
             status=status.HTTP_200_OK,
         )
 
+    except (InvalidCursor, InvalidSort) as e:
+        return Response(
+            {"success": False, "error": str(e)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
     except Exception as e:
         traceback.print_exc()
         return Response(
@@ -83,9 +140,12 @@ def add_task(request):
         serializer = TaskSerializer(data=request.data)
         if serializer.is_valid():
             task = serializer.save(user=request.user)
-            return Response(
-                {"success": True, "task": TaskSerializer(task).data},
-                status=status.HTTP_201_CREATED,
+            return set_etag(
+                Response(
+                    {"success": True, "task": TaskSerializer(task).data},
+                    status=status.HTTP_201_CREATED,
+                ),
+                task_etag(task),
             )
         traceback.print_exc()
         return Response(
@@ -100,19 +160,182 @@ def add_task(request):
         )
 
 
-@api_view(["PUT"])
+@api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def update_task(request, task_id):
+def bulk_add_tasks(request):
     try:
-        task = Task.objects.get(pk=task_id, user=request.user)
+        items = request.data.get("tasks")
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"success": False, "error": "tasks must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > MAX_BULK_TASKS:
+            return Response(
+                {"success": False, "error": f"At most {MAX_BULK_TASKS} tasks per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        serializer = TaskSerializer(task, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save(user=request.user)
+        results = []
+        new_tasks = []
+        for index, item in enumerate(items):
+            serializer = TaskSerializer(data=item)
+            if serializer.is_valid():
+                new_tasks.append(Task(user=request.user, **serializer.validated_data))
+                results.append({"index": index, "success": True})
+            else:
+                results.append({"index": index, "success": False, "errors": serializer.errors})
+
+        created = []
+        if new_tasks:
+            with user_atomic(request.user.id):
+                # MySQL returns no ids from a multi-row insert, so the new rows
+                # are read back: locking the user's newest task makes another
+                # bulk add for the same user wait, leaving the rows after it ours
+                last_id = (
+                    Task.objects.select_for_update()
+                    .filter(user=request.user)
+                    .order_by("-id")
+                    .values_list("id", flat=True)
+                    .first()
+                    or 0
+                )
+                Task.objects.bulk_create(new_tasks)
+                created = list(
+                    Task.objects.filter(user=request.user, id__gt=last_id).order_by("id")
+                )
+            # bulk_create doesn't send post_save
+            bump_user_version(request.user.id)
+        created_data = iter(TaskSerializer(created, many=True).data)
+        for result in results:
+            if result["success"]:
+                result["task"] = next(created_data)
+
+        return Response(
+            {"success": True, "created": len(created), "results": results},
+            status=status.HTTP_201_CREATED,
+        )
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {"success": False, "error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+@api_view(["PUT"])
+@permission_classes([IsAuthenticated])
+def bulk_update_tasks(request):
+    try:
+        changes = {
+            field: request.data[field]
+            for field in ("status", "dueDate")
+            if field in request.data
+        }
+        if not changes:
             return Response(
-                {"success": True, "task": serializer.data},
-                status=status.HTTP_200_OK,
+                {"success": False, "error": "Nothing to update, send status and/or dueDate"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        serializer = TaskSerializer(data=changes, partial=True)
+        if not serializer.is_valid():
+            return Response(
+                {"success": False, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        tasks, requested_ids = select_tasks_for_bulk(request.user, request.data)
+        with user_atomic(request.user.id):
+            matched_ids = list(tasks.select_for_update().values_list("id", flat=True))
+            # queryset updates skip auto_now, so lastUpdated is set explicitly
+            updated = Task.objects.filter(id__in=matched_ids).update(
+                lastUpdated=timezone.now(), **serializer.validated_data
+            )
+        # queryset updates don't send post_save
+        bump_user_version(request.user.id)
+
+        return Response(
+            {
+                "success": True,
+                "updated": updated,
+                "results": bulk_results(
+                    requested_ids, matched_ids, "Task not found or unauthorized"
+                ),
+            },
+            status=status.HTTP_200_OK,
+        )
+    except BulkSelectionError as e:
+        return Response(
+            {"success": False, "error": str(e)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {"success": False, "error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+@api_view(["DELETE"])
+@permission_classes([IsAuthenticated])
+def bulk_delete_tasks(request):
+    try:
+        tasks, requested_ids = select_tasks_for_bulk(request.user, request.data)
+        with user_atomic(request.user.id):
+            matched_ids = list(tasks.select_for_update().values_list("id", flat=True))
+            Task.objects.filter(id__in=matched_ids).delete()
+
+        return Response(
+            {
+                "success": True,
+                "deleted": len(matched_ids),
+                "results": bulk_results(
+                    requested_ids, matched_ids, "Task not found or unauthorized"
+                ),
+            },
+            status=status.HTTP_200_OK,
+        )
+    except BulkSelectionError as e:
+        return Response(
+            {"success": False, "error": str(e)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {"success": False, "error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+@api_view(["PUT"])
+@permission_classes([IsAuthenticated])
+def update_task(request, task_id):
+    try:
+        with user_atomic(request.user.id):
+            # the row lock keeps another session from saving between the
+            # If-Match check and our save
+            task = Task.objects.select_for_update().get(pk=task_id, user=request.user)
+            if if_match_fails(request, task_etag(task)):
+                return set_etag(
+                    Response(
+                        {"success": False, "error": "Task was changed by another session"},
+                        status=status.HTTP_412_PRECONDITION_FAILED,
+                    ),
+                    task_etag(task),
+                )
+
+            serializer = TaskSerializer(task, data=request.data, partial=True)
+            if serializer.is_valid():
+                task = serializer.save(user=request.user)
+                return set_etag(
+                    Response(
+                        {"success": True, "task": serializer.data},
+                        status=status.HTTP_200_OK,
+                    ),
+                    task_etag(task),
+                )
         return Response(
             {"success": False, "errors": serializer.errors},
             status=status.HTTP_400_BAD_REQUEST,
@@ -155,17 +378,13 @@ def delete_task(request, task_id):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@replica_reads
+@condition(etag_func=task_stats_etag)
 def get_task_stats(request):
     try:
-        user = request.user
-
-        stats = {
-            "tasks_completed_this_week": get_tasks_completed_this_week(user),
-            "tasks_in_progress": get_tasks_in_progress(user),
-            "tasks_due_this_week": get_tasks_due_this_week(user),
-            "total_tasks_completed": get_total_tasks_completed(user),
-        }
-
+        stats = get_task_stats_for_user(
+            request.user, getattr(request, "task_stats_version", None)
+        )
         return Response(stats, status=200)
     except Exception as e:
         traceback.print_exc()
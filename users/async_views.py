@@ -0,0 +1,19 @@
+import traceback
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from reflectionsBE.aio import async_jwt_required, run_blocking
+from .views import get_profile_pic_url
+
+
+@require_GET
+@async_jwt_required
+async def get_profile_pic(request):
+    try:
+        presigned_url = await run_blocking(get_profile_pic_url, request.user.id)
+        return JsonResponse({"profilePicUrl": presigned_url}, status=200)
+
+    except Exception as e:
+        traceback.print_exc()
+        return JsonResponse({"error": str(e)}, status=500)
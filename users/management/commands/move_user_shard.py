@@ -0,0 +1,116 @@
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from journal.models import Entry, EntryRevision, EntrySearchTerm, JournalDailyStat, JournalStreak
+from reflectionsBE.sharding import SHARD_CACHE_TTL, initial_shard, shard_aliases, shard_cache
+from tasks.models import Task
+from users.models import UserShard
+
+
+# parents before children, so intra-shard foreign keys resolve on insert
+SHARDED_MODELS = [
+    (Entry, "user_id"),
+    (EntryRevision, "entry__user_id"),
+    (EntrySearchTerm, "user_id"),
+    (JournalDailyStat, "user_id"),
+    (JournalStreak, "user_id"),
+    (Task, "user_id"),
+]
+
+
+@contextmanager
+def keep_timestamps():
+    # rows are copied as they are; auto_now would restamp them with the move time
+    fields = [
+        field
+        for model, _ in SHARDED_MODELS
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def user_rows(model, lookup, user_id, alias):
+    return model._base_manager.using(alias).filter(**{lookup: user_id}).order_by("pk")
+
+
+def fingerprint(user_id, alias):
+    return [user_rows(model, lookup, user_id, alias).count() for model, lookup in SHARDED_MODELS]
+
+
+class Command(BaseCommand):
+    help = "Move one user's journal and task rows to another shard"
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_id", type=int)
+        parser.add_argument("target")
+        parser.add_argument(
+            "--grace",
+            type=float,
+            default=SHARD_CACHE_TTL + 2.0,
+            help="seconds to let in-flight requests finish after locking the user; "
+            "must exceed DB_SHARD_CACHE_TTL so every worker sees the lock",
+        )
+
+    def handle(self, *args, **options):
+        user_id, target = options["user_id"], options["target"]
+        if target not in shard_aliases():
+            raise CommandError(f"{target} is not one of DB_SHARDS: {', '.join(shard_aliases())}")
+        if options["grace"] <= SHARD_CACHE_TTL:
+            raise CommandError(f"--grace must exceed DB_SHARD_CACHE_TTL ({SHARD_CACHE_TTL}s)")
+
+        shard, _ = UserShard.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            user_id=user_id, defaults={"alias": initial_shard(user_id)}
+        )
+        source = shard.alias
+        if source == target:
+            self.stdout.write(f"user {user_id} is already on {target}")
+            return
+
+        # new requests for the user get a 503 until the map points at target
+        UserShard.objects.filter(pk=shard.pk).update(locked=True)
+        try:
+            time.sleep(options["grace"])
+            before = fingerprint(user_id, source)
+            self.copy_rows(user_id, source, target)
+            if fingerprint(user_id, source) != before or fingerprint(user_id, target) != before:
+                raise CommandError("rows changed during the copy, nothing was switched")
+            UserShard.objects.filter(pk=shard.pk).update(alias=target, locked=False)
+            shard_cache.evict(user_id)
+        except Exception:
+            with transaction.atomic(using=target):
+                for model, lookup in reversed(SHARDED_MODELS):
+                    user_rows(model, lookup, user_id, target).delete()
+            UserShard.objects.filter(pk=shard.pk).update(locked=False)
+            shard_cache.evict(user_id)
+            raise
+
+        with transaction.atomic(using=source):
+            for model, lookup in reversed(SHARDED_MODELS):
+                user_rows(model, lookup, user_id, source).delete()
+        self.stdout.write(f"moved user {user_id} from {source} to {target}: {before}")
+
+    def copy_rows(self, user_id, source, target):
+        with transaction.atomic(using=target), keep_timestamps():
+            for model, lookup in SHARDED_MODELS:
+                rows = list(user_rows(model, lookup, user_id, source))
+                # shards allocate disjoint ids, so keeping primary keys is safe
+                taken = model._base_manager.using(target).filter(
+                    pk__in=[row.pk for row in rows]
+                )
+                if taken.exists():
+                    raise CommandError(
+                        f"{model.__name__} ids already used on {target}; "
+                        "shards need disjoint auto_increment ranges"
+                    )
+                model._base_manager.using(target).bulk_create(rows, batch_size=500)
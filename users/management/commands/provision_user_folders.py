@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from users.provisioning import provision_user_folder
+
+
+class Command(BaseCommand):
+    help = "Create the S3 upload folder for every user that is not provisioned yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None)
+
+    def handle(self, *args, **options):
+        pending = (
+            User.objects.filter(
+                Q(storage__isnull=True) | Q(storage__s3FolderProvisioned=False)
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        if options["limit"]:
+            pending = pending[: options["limit"]]
+
+        done = failed = 0
+        for user_id in pending:
+            try:
+                provision_user_folder(user_id)
+                done += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"user {user_id}: {e}")
+        self.stdout.write(f"provisioned {done} users, {failed} failed")
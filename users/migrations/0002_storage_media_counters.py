@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstorage',
+            name='mediaBytes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstorage',
+            name='mediaCount',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
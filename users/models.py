@@ -1,3 +1,27 @@
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class UserStorage(models.Model):
+    # S3 provisioning state, so signin/signup never have to ask S3
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="storage")
+    s3FolderProvisioned = models.BooleanField(default=False)
+    provisionedAt = models.DateTimeField(null=True, blank=True)
+    # maintained by api/media.py alongside UserMedia rows
+    mediaCount = models.PositiveIntegerField(default=0)
+    mediaBytes = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"UserStorage {self.user_id}"
+
+
+class UserShard(models.Model):
+    # which database holds the user's journal and task rows; lives on default
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="shard")
+    alias = models.CharField(max_length=64)
+    # set while move_user_shard copies the user's rows; requests get a 503
+    locked = models.BooleanField(default=False)
+    assignedAt = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"UserShard {self.user_id} {self.alias}"
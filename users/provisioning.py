@@ -0,0 +1,48 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from reflectionsBE.storage import get_storage
+from .models import UserStorage
+
+
+logger = logging.getLogger(__name__)
+# small pool per worker; provisioning is one put_object per user, once
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="s3-provision")
+
+
+def user_folder_key(user_id) -> str:
+    return f"uploads/user-{user_id}/"
+
+
+def provision_user_folder(user_id):
+    get_storage().put_object(user_folder_key(user_id))
+    UserStorage.objects.update_or_create(
+        user_id=user_id,
+        defaults={"s3FolderProvisioned": True, "provisionedAt": timezone.now()},
+    )
+
+
+def run_provisioning(user_id):
+    close_old_connections()
+    try:
+        provision_user_folder(user_id)
+    except Exception:
+        # left unprovisioned; the next signin or provision_user_folders retries
+        logger.exception("Could not provision S3 folder for user %s", user_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_provisioning(user_id):
+    transaction.on_commit(lambda: executor.submit(run_provisioning, user_id))
+
+
+def ensure_provisioned(user):
+    provisioned = (
+        UserStorage.objects.filter(user=user, s3FolderProvisioned=True).exists()
+    )
+    if not provisioned:
+        schedule_provisioning(user.id)
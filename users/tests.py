@@ -1,3 +1,74 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from journal.models import Entry
+from reflectionsBE.sharding import SHARD_CACHE_TTL, shard_cache
+from reflectionsBE.testing import authenticated_client
+from tasks.models import Task
+
+from .models import UserShard
+
+
+@skipUnless("shard1" in settings.DB_SHARDS, "run with DB_SHARD_HOSTS=shard1=<host>")
+class ShardTests(TestCase):
+    databases = set(settings.DB_SHARDS)
+
+    def setUp(self):
+        shard_cache.clear()
+        self.user = User.objects.create_user(username="s@example.com", password="pw")
+        self.user_id = self.user.id
+        UserShard.objects.create(user=self.user, alias="shard1")
+        self.client = authenticated_client(self.user)
+
+    def rows(self, alias):
+        return (
+            Entry.objects.using(alias).filter(user_id=self.user_id).count(),
+            Task.objects.using(alias).filter(user_id=self.user_id).count(),
+        )
+
+    def test_requests_use_the_users_shard(self):
+        self.client.post("/api/journal/createEntry/", {"content": "<p>hi</p>"}, format="json")
+        self.client.post("/api/tasks/add_task/", {"description": "d"}, format="json")
+        self.assertEqual(self.rows("shard1"), (1, 1))
+        self.assertEqual(self.rows("default"), (0, 0))
+        self.assertEqual(self.client.get("/api/journal/getAllEntries/").json()["total_entries"], 1)
+
+    def test_generate_thumbnails_reads_every_shard(self):
+        other = User.objects.create_user(username="t@example.com", password="pw")
+        UserShard.objects.create(user=other, alias="default")
+        Entry.objects.using("default").create(user=other, entryContent="x", imgKey="a.jpg")
+        Entry.objects.using("shard1").create(user=self.user, entryContent="x", imgKey="b.jpg")
+
+        command = "api.management.commands.generate_thumbnails"
+        with mock.patch(f"{command}.get_storage"), mock.patch(
+            f"{command}.generate_variants"
+        ) as generate:
+            call_command("generate_thumbnails", stdout=StringIO())
+        self.assertEqual([call.args[0] for call in generate.call_args_list], ["a.jpg", "b.jpg"])
+
+    def test_move_copies_the_rows_and_switches_the_map(self):
+        # shards allocate disjoint ids in production; the test databases don't
+        Entry.objects.using("shard1").create(id=10**6, user=self.user, entryContent="<p>hi</p>")
+        Task.objects.using("shard1").create(id=10**6, user=self.user, description="d")
+
+        with mock.patch("users.management.commands.move_user_shard.time.sleep"):
+            call_command(
+                "move_user_shard", self.user.id, "default",
+                grace=SHARD_CACHE_TTL + 1, stdout=StringIO(),
+            )
+        self.assertEqual(UserShard.objects.get(user=self.user).alias, "default")
+        self.assertEqual(self.rows("default"), (1, 1))
+        self.assertEqual(self.rows("shard1"), (0, 0))
+        entries = self.client.get("/api/journal/getAllEntries/").json()["entries"]
+        self.assertEqual([entry["id"] for entry in entries], [10**6])
+
+    def test_deleting_the_user_deletes_the_shard_rows(self):
+        self.client.post("/api/journal/createEntry/", {"content": "<p>hi</p>"}, format="json")
+        self.client.post("/api/tasks/add_task/", {"description": "d"}, format="json")
+        self.user.delete()
+        self.assertEqual(self.rows("shard1"), (0, 0))
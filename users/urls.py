@@ -1,4 +1,5 @@
 from django.urls import path
+from reflectionsBE.aio import ASYNC_STORAGE_VIEWS
 from .views import (
     signup,
     signin,
@@ -10,6 +11,9 @@ from .views import (
     update_user_profile,
 )
 
+if ASYNC_STORAGE_VIEWS:
+    from .async_views import get_profile_pic
+
 urlpatterns = [
     path("signup/", signup, name="signup"),
     path("signin/", signin, name="signin"),
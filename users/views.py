@@ -4,21 +4,11 @@ from django.contrib.auth import authenticate
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-import os
-import boto3
-from dotenv import load_dotenv
 from django.contrib.auth.models import User
 import traceback
-
-
-load_dotenv()
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=os.getenv("AWS_REGION")
-)
-BUCKET_NAME = os.getenv("AWS_S3_BUCKET_NAME")
+from reflectionsBE.storage import STORAGE_ERRORS, get_storage
+from .models import UserStorage
+from .provisioning import ensure_provisioned, schedule_provisioning
 
 
 def get_tokens_for_user(user):
@@ -57,9 +47,8 @@ def signin(request):
         )
 
     tokens = get_tokens_for_user(user)
-    folder_exists = check_user_s3_folder(user.id)
-    if not folder_exists:
-        create_user_s3_folder(user.id)
+    # S3 work happens in the background, login only reads the recorded state
+    ensure_provisioned(user)
 
     return Response(
         {"msg": "Login successful", "tokens": tokens},
@@ -67,14 +56,6 @@ def signin(request):
     )
 
 
-def check_user_s3_folder(user_id: str) -> bool:
-    folder_key = f"uploads/{user_id}/"
-    response = s3_client.list_objects_v2(
-        Bucket=BUCKET_NAME, Prefix=folder_key, MaxKeys=1
-    )
-    return "Contents" in response
-
-
 @api_view(["POST"])
 def refresh_access(request):
     refresh_token = request.data.get("refresh")
@@ -115,15 +96,11 @@ def signup(request):
         )
 
     user = User.objects.create_user(username=email, email=email, password=password)
-    create_user_s3_folder(user.id)
+    UserStorage.objects.create(user=user)
+    schedule_provisioning(user.id)
     return Response({"msg": "User created"}, status=status.HTTP_201_CREATED)
 
 
-def create_user_s3_folder(user_id: str):
-    folder_key = f"uploads/user-{user_id}/"
-    s3_client.put_object(Bucket=BUCKET_NAME, Key=folder_key)
-
-
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_user_profile(request):
@@ -159,21 +136,13 @@ def upload_profile_pic(request):
     s3_key = f"uploads/user-{user.id}/profile_pic/profile_pic"
 
     try:
-        s3_client.upload_fileobj(
-            uploaded_file,
-            BUCKET_NAME,
-            s3_key,
-            ExtraArgs={"ContentType": uploaded_file.content_type},
-        )
+        storage = get_storage()
+        storage.upload_fileobj(s3_key, uploaded_file, uploaded_file.content_type)
 
-        presigned_url = s3_client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": BUCKET_NAME, "Key": s3_key},
-            ExpiresIn=3600,
-        )
+        presigned_url = storage.presigned_url(s3_key)
 
         return Response({"profile_pic_url": presigned_url}, status=201)
-    except ClientError as e:
+    except STORAGE_ERRORS as e:
         return Response({"error": str(e)}, status=500)
 
 
@@ -183,15 +152,15 @@ def delete_profile_pic(request):
     try:
         user_id = request.user.id
         prefix = f"uploads/user-{user_id}/profile_pic/profile_pic"
-        response = s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
+        storage = get_storage()
+        keys = [obj["Key"] for obj in storage.list_objects(prefix)]
 
-        if "Contents" not in response:
+        if not keys:
             return Response(
                 {"error": "No profile picture found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        for obj in response["Contents"]:
-            s3_client.delete_object(Bucket=BUCKET_NAME, Key=obj["Key"])
+        storage.delete_many(keys)
 
         return Response(
             {"success": True, "message": "Profile picture deleted"},
@@ -203,24 +172,23 @@ def delete_profile_pic(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def get_profile_pic(request):
-    try:
-        user_id = request.user.id
-        prefix = f"uploads/user-{user_id}/profile_pic/profile_pic"
-        response = s3_client.list_objects_v2(Bucket=BUCKET_NAME, Prefix=prefix)
+def get_profile_pic_url(user_id):
+    prefix = f"uploads/user-{user_id}/profile_pic/profile_pic"
+    storage = get_storage()
+    objects = list(storage.list_objects(prefix))
 
-        if "Contents" not in response or not response["Contents"]:
-            return Response({"profilePicUrl": None}, status=status.HTTP_200_OK)
+    if not objects:
+        return None
 
-        latest_obj = max(response["Contents"], key=lambda x: x["LastModified"])
-        key = latest_obj["Key"]
+    latest_obj = max(objects, key=lambda x: x["LastModified"])
+    return storage.presigned_url(latest_obj["Key"])
 
-        presigned_url = s3_client.generate_presigned_url(
-            "get_object", Params={"Bucket": BUCKET_NAME, "Key": key}, ExpiresIn=3600
-        )
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_profile_pic(request):
+    try:
+        presigned_url = get_profile_pic_url(request.user.id)
         return Response({"profilePicUrl": presigned_url}, status=status.HTTP_200_OK)
 
     except Exception as e: